@@ -1,42 +1,60 @@
 from email import message
-from fastapi import APIRouter, Request, status, HTTPException
+from fastapi import APIRouter, Query, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
 from datetime import date, datetime
 from uuid import uuid4
-from sqlalchemy import update
-from sympy import content
 from app.core.config import MODEL_VECTOR
 from app.core.exceptions import APIException
 from app.db.schemas.journal import ChatbotType, DraftRequest
 from app.core.connection import db
 from fastapi.encoders import jsonable_encoder
 import json
+import time
 from loguru import logger
 
 from app.utils.otp_utils import (
     delete_data,
+    get_chat_context,
     get_history,
     store_draft,
-    store_history,
     store_otp,
 )
-from app.utils.utils import submit_draft
+from app.utils.ingestion import submit_draft
+from app.utils.context_builder import build_context
 from app.utils.chatbot_utils import (
     final_response,
     get_Chat_data,
     get_journals_by_date,
     # query_function,
     query_parser,
+    store_exchange,
+    stream_final_response,
+    stream_message,
 )
 
 router = APIRouter()
 
 
+def event_stream(events) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        # Keeps proxies like nginx from buffering the events.
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/start")
-async def getQuery(request: Request, user_query: ChatbotType):
+async def getQuery(
+    request: Request, user_query: ChatbotType, stream: bool = Query(False)
+):
     """
     Endpoint to handle chatbot queries. It processes the user's query, retrieves relevant journal data,
     and generates a final response using the `final_response` function.
+    With `?stream=true` the answer is sent as Server-Sent Events while it is generated,
+    see `stream_final_response`.
     """
+    started_at = time.perf_counter()
     logger.info(f"Received chatbot query: {user_query.query}")
     print("Received chatbot query:", user_query.query)
     today = datetime.today().strftime("%Y-%m-%d")
@@ -48,24 +66,35 @@ async def getQuery(request: Request, user_query: ChatbotType):
         user = getattr(request.state, "user", None)
 
         try:
-            history = get_history(user_id=user["id"])
+            history, summary = get_chat_context(user_id=user["id"])
         except APIException as e:
             logger.error(f"Failed to load history: {str(e.message)}")
-            history = []
+            history, summary = [], ""
 
-        llm_data = []
+        llm_data = ""
         if not filter_params["is_related"] and not filter_params["is_history"]:
             logger.info("Query is not realted to Journals")
             response = {
                 "message": "I can only help with questions related to your journals. If you have a query about a specific entry, topic, mood, or time period in your journals, feel free to ask! 😊"
             }
-            query_object = {"user_query": user_query.query, "response": response}
-            history.append(query_object)
-            dumped_history = json.dumps(history)
-            store_history(dumped_history, user["id"])
+            store_exchange(history, user_query.query, response, user["id"])
+            if stream:
+                return event_stream(stream_message(response))
             return response
         if filter_params.get("is_history", False):
             logger.info("Processing history-only query")
+            if stream:
+                return event_stream(
+                    stream_final_response(
+                        data=llm_data,
+                        user_query=user_query.query,
+                        history=history,
+                        user_id=user["id"],
+                        is_history=True,
+                        summary=summary,
+                        started_at=started_at,
+                    )
+                )
             try:
                 final_result = final_response(
                     data=llm_data,
@@ -73,6 +102,7 @@ async def getQuery(request: Request, user_query: ChatbotType):
                     history=history,
                     user_id=user["id"],
                     is_history=True,
+                    summary=summary,
                 )
                 return final_result
             except APIException as e:
@@ -100,18 +130,26 @@ async def getQuery(request: Request, user_query: ChatbotType):
                 status_code=500, detail=str(e), message="Error fetching journal data"
             )
 
-        if manual_data.get("data") and len(manual_data["data"]) > 0:
-            for data in manual_data["data"]:
-                data_object = {
-                    "content": data.get("content", ""),
-                    "title": data.get("title", ""),
-                    "date": data.get("created_at", ""),
-                    "moods": data.get("moods", []),
-                    "semantic_result": manual_data.get("Semantic Result", []),
-                    "title_search": manual_data.get("title_search", []),
-                }
-                llm_data.append(data_object)
-
+        # Deduplicated excerpts ranked by retrieval score, within the token budget.
+        if manual_data.get("data") or manual_data.get("Semantic Result"):
+            llm_data = build_context(
+                manual_data.get("data", []),
+                manual_data.get("Semantic Result", []),
+                manual_data.get("title_search", []),
+            )["context"]
+
+        if stream:
+            return event_stream(
+                stream_final_response(
+                    data=llm_data,
+                    user_query=user_query.query,
+                    history=history,
+                    user_id=user["id"],
+                    is_history=False,
+                    summary=summary,
+                    started_at=started_at,
+                )
+            )
         try:
             final_result = final_response(
                 data=llm_data,
@@ -119,6 +157,7 @@ async def getQuery(request: Request, user_query: ChatbotType):
                 history=history,
                 user_id=user["id"],
                 is_history=False,
+                summary=summary,
             )
             return final_result
         except APIException as e:
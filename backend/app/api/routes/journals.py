@@ -1,26 +1,36 @@
 from collections import Counter
 from email import message
-from enum import nonmember
-from tracemalloc import start
-from turtle import st
 from typing import Optional
 from urllib import response
-from fastapi import APIRouter, Request, status, HTTPException
+from fastapi import APIRouter, Query, Request, status, HTTPException
+from fastapi.responses import StreamingResponse
 from datetime import date, datetime, timedelta
 from uuid import uuid4
 
-from sklearn.utils import resample
 from app.core.config import MODEL_VECTOR
 from app.core.exceptions import APIException
 from app.db.schemas.journal import ChatbotType, DateRange, DraftRequest
-from app.core.connection import db
+from app.core.connection import db, redis_client
 from fastapi.encoders import jsonable_encoder
 from loguru import logger
 
 from app.utils.otp_utils import get_history, store_draft, store_otp
-from app.utils.utils import pre_process_journal, submit_draft
+from app.utils.exporter import iter_journal_export, parse_export_fields
+from app.utils.importer import (
+    IMPORT_FORMATS,
+    import_journals,
+    remove_upload,
+    save_upload,
+)
+from app.utils.ingestion import edit_journal, journal_id_for, submit_draft
+from app.utils.jobs import enqueue_job, get_job
+from app.utils.utils import pre_process_journal
 from app.utils.chatbot_utils import (
+    JOURNAL_PROJECTIONS,
+    decode_cursor,
+    encode_cursor,
     final_response,
+    get_journal_page,
     get_journals_by_date,
     # query_function,
     query_parser,
@@ -28,34 +38,46 @@ from app.utils.chatbot_utils import (
 
 router = APIRouter()
 
+JOURNAL_PAGE_SIZE = 20
+MAX_JOURNAL_PAGE_SIZE = 100
+
 
 @router.get("/get")
 def get_all_journal(
-    request: Request, start_date: Optional[date] = None, end_date: Optional[date] = None
+    request: Request,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(JOURNAL_PAGE_SIZE, ge=1, le=MAX_JOURNAL_PAGE_SIZE),
+    cursor: Optional[str] = None,
 ):
+    """
+    Endpoint to list journals newest first, one page at a time. Pass the
+    returned next_cursor back as cursor to get the following page, it is
+    null on the last page.
+    """
     try:
         user = getattr(request.state, "user", None)
-        if start_date and end_date:
-            response = get_journals_by_date(user["id"], start_date, end_date)
-        elif start_date and not end_date:
-            response = get_journals_by_date(user["id"], start_date)
-        elif end_date and not start_date:
-            response = get_journals_by_date(user["id"], end_date=end_date)
-        else:
-            response = get_journals_by_date(user["id"])
-
-        if not response or not response[0]:
-            return []
+        # One extra row tells whether another page follows.
+        journals = get_journal_page(
+            user["id"],
+            JOURNAL_PROJECTIONS["list"],
+            after=decode_cursor(cursor),
+            limit=limit + 1,
+            descending=True,
+            start_date=start_date,
+            end_date=end_date,
+        )
+        has_more = len(journals) > limit
+        journals = journals[:limit]
 
-        journals = response
         data = []
-
         for journal in journals:
             created_at = journal.get("created_at")
             if not created_at:
                 continue
-            date_obj = datetime.strptime(created_at, "%Y-%m-%d")
-            formatted_date = date_obj.strftime("%d %B, %Y").lstrip("0")
+            formatted_date = (
+                date.fromisoformat(created_at).strftime("%d %B, %Y").lstrip("0")
+            )
 
             # Prepare data
             data_obj = {
@@ -69,11 +91,14 @@ def get_all_journal(
                 "created_at": journal.get("created_at", ""),
             }
             data.append(data_obj)
-        return data
+        return {
+            "data": data,
+            "next_cursor": encode_cursor(journals[-1]) if has_more else None,
+        }
     except APIException as e:
         logger.exception(f"Unexpected error in getting all journals: {str(e)}")
         raise APIException(
-            status_code=400,
+            status_code=e.status_code,
             detail=str(e.detail),
             message=str(e.message),
             hint=str(e.hint),
@@ -149,7 +174,8 @@ async def save_drafts(request: Request, draft: DraftRequest):
 @router.post("/draft/submit")
 async def save_draft(request: Request):
     """
-    Endpoint to save a draft journal entry.
+    Endpoint to submit today's draft. Processing runs in the background, the
+    response carries a job ID to poll on /draft/submit/{job_id}.
     """
     try:
         logger.info("Starting /test endpoint execution")
@@ -171,10 +197,24 @@ async def save_draft(request: Request):
                 detail="You Have Submitted Today's Journal, Come again Tomorrow",
                 message="You Have Submitted Today's Journal",
             )
-        print("userID", user["id"])
-        variable_test = submit_draft(user["id"])
-        # logger.debug(f"submit_draft result: {variable_test}")
-        return {"message": variable_test}
+        if not redis_client.exists(f"Draft:{user['id']}:{today}"):
+            raise APIException(
+                status_code=400,
+                detail="No valid draft data found",
+                message="No Drafts Processed",
+            )
+        job = enqueue_job(
+            journal_id_for(user["id"], today),
+            user["id"],
+            submit_draft,
+            user["id"],
+            today,
+        )
+        return {
+            "message": "Journal Submission Queued",
+            "job_id": job["job_id"],
+            "status": job["status"],
+        }
     except APIException as e:
         logger.error(f"Custom APIException caught: {str(e.message)}")
         raise e  # Re-raise as-is
@@ -188,6 +228,103 @@ async def save_draft(request: Request):
         )
 
 
+def _get_user_job(request: Request, job_id: str) -> dict:
+    user = getattr(request.state, "user", None)
+    job = get_job(job_id)
+    if not job or job["user_id"] != user["id"]:
+        raise APIException(
+            status_code=404,
+            detail=f"No job found with id {job_id}",
+            message="Job Not Found",
+        )
+    return job
+
+
+@router.get("/draft/submit/{job_id}")
+def get_submit_status(request: Request, job_id: str):
+    """
+    Endpoint to check a draft submission job: queued, running, done or failed.
+    """
+    job = _get_user_job(request, job_id)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "updated_at": job["updated_at"],
+    }
+
+
+@router.post("/import")
+async def import_journal_entries(request: Request, format: str = "ndjson"):
+    """
+    Endpoint to import journals from another app. The request body is either
+    NDJSON, one entry per line with date, title, content and tags, or a zip
+    archive of Markdown files (format=markdown). The body is spooled to disk
+    as it arrives and imported in the background, the response carries a job
+    ID to poll on /import/{job_id}.
+    """
+    user = getattr(request.state, "user", None)
+    if format not in IMPORT_FORMATS:
+        raise APIException(
+            status_code=400,
+            detail=f"Import format must be one of {', '.join(IMPORT_FORMATS)}",
+            message="Invalid Import Format",
+        )
+    path = await save_upload(request.stream(), format)
+    job = enqueue_job(
+        str(uuid4()),
+        user["id"],
+        import_journals,
+        user["id"],
+        path,
+        format,
+        cleanup=lambda: remove_upload(path),
+        pool="import",
+    )
+    return {
+        "message": "Journal Import Queued",
+        "job_id": job["job_id"],
+        "status": job["status"],
+    }
+
+
+@router.get("/import/{job_id}")
+def get_import_status(request: Request, job_id: str):
+    """
+    Endpoint to follow an import job. Progress counts update after every batch
+    and the result lists the first entries that could not be parsed.
+    """
+    job = _get_user_job(request, job_id)
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "error": job["error"],
+        "progress": job.get("progress"),
+        "result": job["result"] if job["status"] == "done" else None,
+        "updated_at": job["updated_at"],
+    }
+
+
+@router.get("/export")
+def export_journals(request: Request, fields: Optional[str] = None):
+    """
+    Endpoint to download every journal as NDJSON, one journal per line.
+    ``fields`` is a comma separated subset of the journal columns, embeddings
+    are only included when listed.
+    """
+    user = getattr(request.state, "user", None)
+    selected = parse_export_fields(fields)
+    return StreamingResponse(
+        iter_journal_export(user["id"], selected),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": f'attachment; filename="mindsync-journals-{date.today().isoformat()}.ndjson"'
+        },
+    )
+
+
 @router.get("/dashboard/analysis")
 async def get_user_analysis(
     request: Request, start_date: Optional[date] = None, end_date: Optional[date] = None
@@ -201,13 +338,17 @@ async def get_user_analysis(
 
         user_id = user["id"]
         if start_date and end_date:
-            journals = get_journals_by_date(user_id, start_date, end_date)
+            journals = get_journals_by_date(
+                user_id, start_date, end_date, projection="dashboard"
+            )
         elif start_date and not end_date:
-            journals = get_journals_by_date(user_id, start_date)
+            journals = get_journals_by_date(user_id, start_date, projection="dashboard")
         elif not start_date and end_date:
-            journals = get_journals_by_date(user_id, end_date)
+            journals = get_journals_by_date(
+                user_id, end_date=end_date, projection="dashboard"
+            )
         else:
-            journals = get_journals_by_date(user_id)
+            journals = get_journals_by_date(user_id, projection="dashboard")
 
         # print("journals first",journals)
         if not journals:
@@ -243,7 +384,6 @@ async def get_user_analysis(
                 "id": i.get("id", ""),
                 "title": i.get("title", ""),
                 "content": i.get("content", ""),
-                "rich_text": i.get("rich_text", ""),
                 "date": formatted_date,
                 "moods": i.get("moods", []),
                 "tags": i.get("tags", []),
@@ -373,3 +513,31 @@ def get_last_submission_date(request: Request):
             detail=str(e),
             message="An error occurred while retrieving the last submission date.",
         )
+
+
+@router.put("/{journal_id}")
+def edit_journal_entry(request: Request, journal_id: str, draft: DraftRequest):
+    """
+    Endpoint to edit a submitted journal. Only sections whose text changed go
+    through the models again.
+    """
+    user = getattr(request.state, "user", None)
+    try:
+        result = edit_journal(
+            journal_id,
+            user["id"],
+            content=draft.plain_text,
+            title=draft.title,
+            tags=[item["text"] for item in draft.tags],
+            rich_text=draft.rich_text,
+        )
+        return {"message": "Journal Updated", **result}
+    except APIException as e:
+        raise e
+    except Exception as e:
+        logger.exception(f"Error editing journal {journal_id}: {str(e)}")
+        raise APIException(
+            status_code=500,
+            detail=str(e),
+            message="An error occurred while editing the journal.",
+        )
@@ -24,8 +24,35 @@ GOOGLE_SECRET_KEY: str = os.getenv("GOOGLE_CLIENT_SECRET")
 GOOGLE_URI: str = os.getenv("GOOGLE_REDIRECT_URI")
 ENVIRONMENT: str = os.getenv("ENVIRONMENT", "development")
 MODEL_VECTOR: str = os.getenv("VECTOR_MODEL")
+INFERENCE_URL: str = os.getenv("INFERENCE_URL")
+INFERENCE_BACKEND: str = os.getenv("INFERENCE_BACKEND", "torch")
+INFERENCE_CACHE_SIZE: int = int(os.getenv("INFERENCE_CACHE_SIZE", 4096))
+INFERENCE_CACHE_TTL_SECONDS: int = int(os.getenv("INFERENCE_CACHE_TTL_SECONDS", 0))
+# 0 fills the embedding model's context, larger sizes are capped to it.
+CHUNK_TOKENS: int = int(os.getenv("CHUNK_TOKENS", 0))
+CHUNK_OVERLAP_TOKENS: int = int(os.getenv("CHUNK_OVERLAP_TOKENS", 32))
+MICRO_BATCH_MAX_SIZE: int = int(os.getenv("MICRO_BATCH_MAX_SIZE", 32))
+MICRO_BATCH_MAX_WAIT_MS: float = float(os.getenv("MICRO_BATCH_MAX_WAIT_MS", 5))
 GEMINI_KEY: str = os.getenv("GEMINI_KEY")
 FRONTEND_URL: str = os.getenv("FRONTEND_URL")
+INGEST_WORKERS: int = int(os.getenv("INGEST_WORKERS", 2))
+INGEST_MAX_RETRIES: int = int(os.getenv("INGEST_MAX_RETRIES", 3))
+IMPORT_WORKERS: int = int(os.getenv("IMPORT_WORKERS", 1))
+IMPORT_MAX_BYTES: int = int(os.getenv("IMPORT_MAX_BYTES", 50 * 1024 * 1024))
+IMPORT_BATCH_SIZE: int = int(os.getenv("IMPORT_BATCH_SIZE", 32))
+VECTOR_STORE: str = os.getenv("VECTOR_STORE", "supabase")
+LOCAL_INDEX_MAX_USERS: int = int(os.getenv("LOCAL_INDEX_MAX_USERS", 256))
+HNSW_MIN_SECTIONS: int = int(os.getenv("HNSW_MIN_SECTIONS", 5000))
+CHAT_CONTEXT_TOKENS: int = int(os.getenv("CHAT_CONTEXT_TOKENS", 2000))
+# Chat turns always replayed to the LLM, turns folded into the rolling summary
+# at a time, and turns kept per user. The cap is at least the other two
+# combined, so no turn is trimmed before it is summarized.
+CHAT_HISTORY_WINDOW: int = int(os.getenv("CHAT_HISTORY_WINDOW", 6))
+CHAT_SUMMARY_BATCH: int = int(os.getenv("CHAT_SUMMARY_BATCH", 6))
+CHAT_HISTORY_MAX_TURNS: int = max(
+    int(os.getenv("CHAT_HISTORY_MAX_TURNS", 100)),
+    CHAT_HISTORY_WINDOW + CHAT_SUMMARY_BATCH,
+)
 
 
 # # Log configuration values
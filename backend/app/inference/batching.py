@@ -0,0 +1,113 @@
+from concurrent.futures import Future
+import queue
+import threading
+import time
+from typing import Callable, List, Sequence, Tuple
+import numpy as np
+from loguru import logger
+
+from app.core.config import MICRO_BATCH_MAX_SIZE, MICRO_BATCH_MAX_WAIT_MS
+
+
+class MicroBatcher:
+    """
+    Collects concurrent requests for a model and runs them as one batch.
+
+    A single worker thread takes the first waiting request, then keeps
+    collecting for up to ``max_wait_ms`` or until ``max_batch_size`` texts are
+    queued, runs ``run_batch`` once over all of them and hands every caller its
+    own slice of the results. A request larger than the batch size is never
+    split, it simply forms a batch of its own.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[str]], Sequence],
+        max_batch_size: int = MICRO_BATCH_MAX_SIZE,
+        max_wait_ms: float = MICRO_BATCH_MAX_WAIT_MS,
+        name: str = "batcher",
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.requests: "queue.Queue[Tuple[List[str], Future]]" = queue.Queue()
+        self.worker = threading.Thread(target=self._loop, name=name, daemon=True)
+        self.worker.start()
+
+    def submit(self, texts: List[str]) -> Future:
+        future = Future()
+        self.requests.put((texts, future))
+        return future
+
+    def __call__(self, texts: List[str]):
+        return self.submit(texts).result()
+
+    def _collect(self) -> List[Tuple[List[str], Future]]:
+        batch = [self.requests.get()]
+        size = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.perf_counter()
+            try:
+                request = (
+                    self.requests.get(timeout=remaining)
+                    if remaining > 0
+                    else self.requests.get_nowait()
+                )
+            except queue.Empty:
+                break
+            batch.append(request)
+            size += len(request[0])
+        return batch
+
+    def _loop(self):
+        while True:
+            batch = self._collect()
+            texts = [text for request_texts, _ in batch for text in request_texts]
+            try:
+                results = self.run_batch(texts) if texts else []
+            except Exception as e:
+                logger.error(f"❌ Batch of {len(texts)} texts failed: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for request_texts, future in batch:
+                future.set_result(results[offset : offset + len(request_texts)])
+                offset += len(request_texts)
+
+
+class BatchedEmbeddings:
+    """``embed_documents`` with concurrent callers sharing forward passes."""
+
+    def __init__(self, model, **batcher_options):
+        self.model = model
+        self.batcher = MicroBatcher(
+            self._embed, name="embedding-batcher", **batcher_options
+        )
+
+    def _embed(self, texts: List[str]) -> np.ndarray:
+        return np.asarray(self.model.embed_documents(texts), dtype=np.float32)
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        return self.batcher(texts)
+
+
+class BatchedClassifier:
+    """The text-classification pipeline call with concurrent callers batched."""
+
+    def __init__(self, classifier, **batcher_options):
+        self.classifier = classifier
+        self.batcher = MicroBatcher(
+            self._classify, name="classifier-batcher", **batcher_options
+        )
+
+    def _classify(self, texts: List[str]) -> List[List[dict]]:
+        return self.classifier(
+            texts, batch_size=min(self.batcher.max_batch_size, len(texts))
+        )
+
+    def __call__(self, texts: List[str], batch_size: int = None) -> List[List[dict]]:
+        # The batch size is owned by the batcher, callers cannot override it.
+        return self.batcher(texts)
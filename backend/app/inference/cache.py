@@ -0,0 +1,128 @@
+import base64
+from collections import OrderedDict
+import hashlib
+import json
+import threading
+from typing import Callable, List, Optional
+import numpy as np
+from loguru import logger
+
+
+class InferenceCache:
+    """
+    Model outputs keyed by (model id, sha256 of the text). Lookups go to an
+    in-process LRU first and then, when a Redis client and TTL are given, to
+    Redis, so identical titles, chunks and chat queries are inferred once.
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        max_entries: int,
+        encode: Callable = json.dumps,
+        decode: Callable = json.loads,
+        redis=None,
+        ttl_seconds: int = 0,
+    ):
+        self.model_id = model_id
+        self.max_entries = max_entries
+        self.encode = encode
+        self.decode = decode
+        self.redis = redis if ttl_seconds > 0 else None
+        self.ttl_seconds = ttl_seconds
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = self.redis_hits = self.misses = 0
+
+    def key(self, text: str) -> str:
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"Inference:{self.model_id}:{digest}"
+
+    def _remember(self, key: str, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def get_many(self, keys: List[str]) -> List[Optional[object]]:
+        values = [None] * len(keys)
+        with self.lock:
+            for i, key in enumerate(keys):
+                if key in self.entries:
+                    self.entries.move_to_end(key)
+                    values[i] = self.entries[key]
+
+        missing = [i for i, value in enumerate(values) if value is None]
+        if self.redis and missing:
+            try:
+                stored = self.redis.mget([keys[i] for i in missing])
+            except Exception as e:
+                logger.warning(f"⚠️ Inference cache Redis lookup failed: {str(e)}")
+                stored = [None] * len(missing)
+            with self.lock:
+                for i, data in zip(missing, stored):
+                    if data is not None:
+                        values[i] = self.decode(data)
+                        self._remember(keys[i], values[i])
+                        self.redis_hits += 1
+
+        with self.lock:
+            found = sum(value is not None for value in values)
+            self.hits += found
+            self.misses += len(values) - found
+        return values
+
+    def set_many(self, keys: List[str], values: List[object]):
+        with self.lock:
+            for key, value in zip(keys, values):
+                self._remember(key, value)
+        if self.redis:
+            try:
+                pipe = self.redis.pipeline(transaction=False)
+                for key, value in zip(keys, values):
+                    pipe.set(key, self.encode(value), ex=self.ttl_seconds)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"⚠️ Inference cache Redis write failed: {str(e)}")
+
+    def clear(self):
+        """Drop the in-process entries; the Redis tier expires on its own."""
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "model": self.model_id,
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "redis_hits": self.redis_hits,
+                "misses": self.misses,
+            }
+
+
+def cached_batch(cache: InferenceCache, texts: List[str], compute: Callable) -> list:
+    """
+    Look every text up in the cache and run ``compute`` once over the distinct
+    texts that missed. Returns one value per text, in input order.
+    """
+    keys = [cache.key(text) for text in texts]
+    values = cache.get_many(keys)
+
+    missing = {}
+    for key, text, value in zip(keys, texts, values):
+        if value is None and key not in missing:
+            missing[key] = text
+    if missing:
+        computed = dict(zip(missing, compute(list(missing.values()))))
+        cache.set_many(list(computed), list(computed.values()))
+        values = [computed.get(key, value) for key, value in zip(keys, values)]
+    return values
+
+
+def encode_vector(vector: np.ndarray) -> str:
+    return base64.b64encode(np.asarray(vector, dtype=np.float32).tobytes()).decode()
+
+
+def decode_vector(data: str) -> np.ndarray:
+    return np.frombuffer(base64.b64decode(data), dtype=np.float32)
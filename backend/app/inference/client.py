@@ -0,0 +1,60 @@
+import base64
+from functools import lru_cache
+from typing import List
+import httpx
+import numpy as np
+
+INFERENCE_TIMEOUT_SECONDS = 120
+
+
+@lru_cache(maxsize=None)
+def create_http_client(url: str) -> httpx.Client:
+    """
+    HTTP client for the inference service. ``unix:///path/to.sock`` talks to a
+    Unix socket, anything else is used as the base URL.
+    """
+    if url.startswith("unix://"):
+        return httpx.Client(
+            transport=httpx.HTTPTransport(uds=url[len("unix://") :]),
+            base_url="http://inference",
+            timeout=INFERENCE_TIMEOUT_SECONDS,
+        )
+    return httpx.Client(base_url=url, timeout=INFERENCE_TIMEOUT_SECONDS)
+
+
+class RemoteEmbeddings:
+    """Drop-in for ``HuggingFaceEmbeddings.embed_documents`` over the service."""
+
+    def __init__(self, http: httpx.Client):
+        self.http = http
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        response = self.http.post("/embed", json={"texts": texts})
+        response.raise_for_status()
+        body = response.json()
+        data = np.frombuffer(base64.b64decode(body["data"]), dtype=np.float32)
+        return data.reshape(body["shape"])
+
+
+class RemoteClassifier:
+    """Drop-in for the go_emotions ``pipeline`` call over the service."""
+
+    def __init__(self, http: httpx.Client):
+        self.http = http
+
+    def __call__(self, texts: List[str], batch_size: int = 32) -> List[List[dict]]:
+        response = self.http.post(
+            "/classify", json={"texts": texts, "batch_size": batch_size}
+        )
+        response.raise_for_status()
+        return response.json()["results"]
+
+
+@lru_cache(maxsize=None)
+def remote_embeddings(url: str) -> RemoteEmbeddings:
+    return RemoteEmbeddings(create_http_client(url))
+
+
+@lru_cache(maxsize=None)
+def remote_classifier(url: str) -> RemoteClassifier:
+    return RemoteClassifier(create_http_client(url))
@@ -0,0 +1,126 @@
+import os
+import threading
+from typing import List
+import numpy as np
+
+from app.core.config import INFERENCE_BACKEND, MODEL_VECTOR
+from app.inference.batching import BatchedClassifier, BatchedEmbeddings
+
+EMOTION_MODEL = "SamLowe/roberta-base-go_emotions"
+
+# torch: fp32 PyTorch. torch-int8: PyTorch with Linear layers dynamically
+# quantized to int8. onnx: ONNX Runtime, needs `pip install optimum[onnxruntime]`.
+INFERENCE_BACKENDS = ("torch", "torch-int8", "onnx")
+ONNX_CACHE_DIR = os.path.expanduser("~/.cache/mindsync/onnx")
+
+# transformers, torch and sentence-transformers take seconds and hundreds of MB
+# to import, so the models and their libraries are loaded on first use only.
+_models = {}
+_load_lock = threading.Lock()
+
+
+class SentenceEmbeddings:
+    """
+    ``embed_documents`` over a SentenceTransformer, producing the same vectors
+    as ``HuggingFaceEmbeddings`` but as a float32 matrix.
+    """
+
+    def __init__(self, model):
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> np.ndarray:
+        texts = [text.replace("\n", " ") for text in texts]
+        return self.model.encode(texts, convert_to_numpy=True, show_progress_bar=False)
+
+
+def _check_backend(backend: str):
+    if backend not in INFERENCE_BACKENDS:
+        raise ValueError(
+            f"Unknown INFERENCE_BACKEND {backend!r}, expected one of {INFERENCE_BACKENDS}"
+        )
+
+
+def _quantize(model):
+    import torch
+
+    return torch.quantization.quantize_dynamic(
+        model, {torch.nn.Linear}, dtype=torch.qint8
+    )
+
+
+def _onnx_classifier_model():
+    try:
+        from optimum.onnxruntime import ORTModelForSequenceClassification
+    except ImportError as e:
+        raise ImportError(
+            "INFERENCE_BACKEND=onnx requires `pip install optimum[onnxruntime]`"
+        ) from e
+
+    # Exporting to ONNX takes a while, so the exported model is kept on disk.
+    path = os.path.join(ONNX_CACHE_DIR, EMOTION_MODEL.replace("/", "--"))
+    if os.path.isdir(path):
+        return ORTModelForSequenceClassification.from_pretrained(path)
+    model = ORTModelForSequenceClassification.from_pretrained(
+        EMOTION_MODEL, export=True
+    )
+    model.save_pretrained(path)
+    return model
+
+
+def load_embedding_model(backend: str = INFERENCE_BACKEND) -> SentenceEmbeddings:
+    _check_backend(backend)
+    from sentence_transformers import SentenceTransformer
+
+    if backend == "onnx":
+        return SentenceEmbeddings(SentenceTransformer(MODEL_VECTOR, backend="onnx"))
+    model = SentenceTransformer(MODEL_VECTOR)
+    if backend == "torch-int8":
+        model = _quantize(model)
+    return SentenceEmbeddings(model)
+
+
+def load_mood_classifier(backend: str = INFERENCE_BACKEND):
+    _check_backend(backend)
+    from transformers import (
+        AutoModelForSequenceClassification,
+        AutoTokenizer,
+        pipeline,
+    )
+
+    if backend == "onnx":
+        model = _onnx_classifier_model()
+    else:
+        model = AutoModelForSequenceClassification.from_pretrained(EMOTION_MODEL)
+        if backend == "torch-int8":
+            model = _quantize(model)
+    return pipeline(
+        "text-classification",
+        model=model,
+        tokenizer=AutoTokenizer.from_pretrained(EMOTION_MODEL),
+        top_k=None,
+        truncation=True,
+    )
+
+
+def _load_once(name: str, loader):
+    if name not in _models:
+        with _load_lock:
+            if name not in _models:
+                _models[name] = loader()
+    return _models[name]
+
+
+def embedding_model() -> BatchedEmbeddings:
+    """
+    Sentence embedding model for INFERENCE_BACKEND behind a micro-batcher so
+    concurrent submissions and chat queries share forward passes. The raw model
+    is on ``.model``.
+    """
+    return _load_once("embedding", lambda: BatchedEmbeddings(load_embedding_model()))
+
+
+def mood_classifier() -> BatchedClassifier:
+    """go_emotions pipeline behind a micro-batcher, raw pipeline on ``.classifier``."""
+    return _load_once(
+        "mood_classifier", lambda: BatchedClassifier(load_mood_classifier())
+    )
@@ -0,0 +1,53 @@
+"""
+Inference service that loads the embedding and emotion models once and serves
+them to every API worker. Run it next to the API, for example on a Unix socket:
+
+    uvicorn app.inference.server:app --uds /tmp/mindsync-inference.sock
+
+and point the API at it with INFERENCE_URL=unix:///tmp/mindsync-inference.sock.
+"""
+
+import base64
+from typing import List
+import numpy as np
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from app.inference.models import embedding_model, mood_classifier
+
+
+class TextsRequest(BaseModel):
+    texts: List[str]
+    batch_size: int = 32
+
+
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+
+# Load both models before the socket is bound, start.sh waits on it.
+embedding_model()
+mood_classifier()
+
+
+@app.get("/health")
+def health():
+    return {"status": "ok"}
+
+
+@app.post("/embed")
+def embed(request: TextsRequest):
+    vectors = np.asarray(
+        embedding_model().embed_documents(request.texts), dtype=np.float32
+    )
+    # Raw float32 bytes are a fraction of the size of a JSON float list.
+    return {
+        "shape": list(vectors.shape),
+        "data": base64.b64encode(vectors.tobytes()).decode(),
+    }
+
+
+@app.post("/classify")
+def classify(request: TextsRequest):
+    if not request.texts:
+        return {"results": []}
+    batch_size = min(request.batch_size, len(request.texts))
+    return {"results": mood_classifier()(request.texts, batch_size=batch_size)}
@@ -8,6 +8,7 @@ from starlette.middleware.sessions import SessionMiddleware
 from loguru import logger
 import sys
 from app.core.config import ENVIRONMENT, FRONTEND_URL, JWT_SECRET
+from app.utils.utils import inference_cache_stats
 from app.core.exceptions import (
     APIException,
     api_exception_handler,
@@ -59,4 +60,5 @@ async def heartbeat():
         "status": "ok",
         "message": "Welcome to the AI Journaling Platform",
         "timestamp": datetime.utcnow().isoformat(),
+        "inference_cache": inference_cache_stats(),
     }
@@ -1,18 +1,37 @@
-from datetime import datetime
+import base64
+from concurrent.futures import ThreadPoolExecutor
+import copy
+from datetime import date, datetime
 import json
+import time
+from typing import Optional, Tuple
+from uuid import UUID
 import re
 from urllib import response
-import dateparser
 import google.generativeai as genai
 from loguru import logger
 from pydantic import BaseModel
-from sympy import false
 
-from app.core.config import GEMINI_KEY
-from app.core.connection import db
+from app.core.config import GEMINI_KEY, INFERENCE_CACHE_SIZE
+from app.core.connection import db, redis_client
 from app.core.exceptions import APIException
-from app.utils.utils import direct_embedding
-from app.utils.otp_utils import store_history
+from app.inference.cache import InferenceCache
+from app.utils.intent import classify_intent
+from app.utils.utils import embed_texts
+from app.utils.otp_utils import (
+    append_history,
+    claim_history_summary,
+    get_turns_to_summarize,
+    release_history_summary,
+    store_history_summary,
+)
+from app.utils.lexical_index import lexical_search
+from app.utils.query_parsing import (
+    GO_EMOTION_LABELS,
+    normalize_query,
+    parse_query_locally,
+)
+from app.utils.vector_store import get_vector_store
 
 safety = [
     {"category": "HARM_CATEGORY_HARASSMENT", "threshold": "BLOCK_LOW_AND_ABOVE"},
@@ -25,35 +44,6 @@ safety = [
 ]
 
 
-GO_EMOTION_LABELS = [
-    "admiration",
-    "amusement",
-    "annoyance",
-    "approval",
-    "caring",
-    "confusion",
-    "curiosity",
-    "desire",
-    "disappointment",
-    "disapproval",
-    "disgust",
-    "embarrassment",
-    "excitement",
-    "fear",
-    "gratitude",
-    "grief",
-    "joy",
-    "love",
-    "nervousness",
-    "optimism",
-    "pride",
-    "realization",
-    "relief",
-    "remorse",
-    "sadness",
-    "surprise",
-    "neutral",
-]
 genai.configure(api_key=GEMINI_KEY)
 model = genai.GenerativeModel("gemini-1.5-flash", safety_settings=safety)
 
@@ -64,7 +54,7 @@ today = datetime.today().strftime("%Y-%m-%d")
 print(today)
 
 
-def query_parser(user_query: str):
+def _llm_query_parser(user_query: str, today: str) -> Optional[dict]:
     prompt = f"""
     You are a helpful assistant for an AI journaling app.
     Your job is to parse a user’s natural language query and any accompanying recollections into structured JSON to help the app search journal entries or determine if the query is purely conversational.
@@ -92,14 +82,106 @@ def query_parser(user_query: str):
     try:
         parsed = json.loads(cleaned)
     except json.JSONDecodeError:
-        return {}
-    return parsed
+        return None
+    return parsed if isinstance(parsed, dict) else None
+
+
+def _parsed_date(value) -> Optional[str]:
+    # The LLM answers "None", "null" or "" for an open end of the range.
+    try:
+        return date.fromisoformat(str(value)[:10]).isoformat()
+    except ValueError:
+        return None
+
+
+def _clean_parsed(parsed: dict) -> dict:
+    date_range = parsed.get("date_range") or {}
+    return {
+        "date_range": {
+            "start": _parsed_date(date_range.get("start")),
+            "end": _parsed_date(date_range.get("end")),
+        },
+        "moods": [m for m in parsed.get("moods") or [] if m in GO_EMOTION_LABELS],
+        "tags": [str(tag) for tag in parsed.get("tags") or []],
+        "title": parsed.get("title") or "",
+        "is_history": bool(parsed.get("is_history", False)),
+        "is_related": bool(parsed.get("is_related", True)),
+    }
 
 
-def get_journals_by_date(user_id, start_date=None, end_date=None):
+# Parsed queries keyed by the date and the normalized query, since relative
+# dates like "yesterday" resolve differently from one day to the next.
+query_parse_cache = InferenceCache(
+    "query-parser",
+    INFERENCE_CACHE_SIZE,
+    redis=redis_client,
+    ttl_seconds=24 * 60 * 60,
+)
+
+
+def query_parser(user_query: str) -> dict:
+    """
+    Date range, moods, tags, title and the is_history / is_related flags of a
+    chat query. The intent classifier in app.utils.intent and the local
+    parser in app.utils.query_parsing answer most queries in a few ms,
+    Gemini is only asked when they are not confident.
+    Results are cached per day by the normalized query text.
+    """
+    start = time.perf_counter()
+    today = date.today()
+    normalized = normalize_query(user_query)
+    key = query_parse_cache.key(f"{today.isoformat()}:{normalized}")
+    [parsed] = query_parse_cache.get_many([key])
+    source = "cache"
+    if parsed is None:
+        intent, confidence = classify_intent(user_query)
+        logger.info(f"Intent {intent} with margin {confidence:.3f}")
+        parsed, source = parse_query_locally(normalized, today, intent), "local"
+        if parsed is None:
+            parsed = _llm_query_parser(user_query, today.isoformat())
+            source = "llm"
+        if parsed is not None:
+            parsed = _clean_parsed(parsed)
+            query_parse_cache.set_many([key], [parsed])
+
+    elapsed = (time.perf_counter() - start) * 1000
+    logger.info(f"⏱️ Query parsed by {source} in {elapsed:.1f} ms")
+    # A failed LLM parse falls back to a plain journal search.
+    return copy.deepcopy(parsed) if parsed is not None else _clean_parsed({})
+
+
+# Columns read by each kind of caller. The two vector columns and rich_text are
+# most of a journal row's size, so only the callers that use them select them.
+JOURNAL_PROJECTIONS = {
+    "list": "id, title, content, rich_text, moods, tags, created_at",
+    "dashboard": "id, title, content, moods, tags, created_at",
+    "chat-context": "id, title, content, moods, tags, created_at",
+    "ids": "id",
+    "full": "*",
+}
+
+
+def get_journals_by_date(
+    user_id, start_date=None, end_date=None, projection="full", moods=None, tags=None
+):
+    """
+    A user's journals in a date range. ``moods`` keeps journals having any of
+    the moods and ``tags`` journals sharing any of the tags, both evaluated by
+    Postgres so only matching rows are sent back.
+    """
     try:
         print("Getting journals by date...")
-        query = db.from_("journals").select("*").eq("user_id", user_id)
+        columns = JOURNAL_PROJECTIONS[projection]
+        query = db.from_("journals").select(columns).eq("user_id", user_id)
+        if moods:
+            # Journal moods only ever hold classifier labels, anything else
+            # cannot match, and keeping to the labels keeps the filter well formed.
+            moods = [mood for mood in moods if mood in GO_EMOTION_LABELS]
+            if not moods:
+                return []
+            query = query.or_(",".join(f"moods->>{mood}.not.is.null" for mood in moods))
+        if tags:
+            query = query.ov("tags", list(tags))
 
         # Apply date filters only if provided
         if start_date and end_date:
@@ -132,34 +214,40 @@ def get_journals_by_date(user_id, start_date=None, end_date=None):
         )
 
 
-def filter_by_title(title: str, journal_ids: list):
+def get_journal_page(
+    user_id,
+    columns: str = "*",
+    after: Optional[Tuple[str, str]] = None,
+    limit: int = 100,
+    descending: bool = False,
+    start_date=None,
+    end_date=None,
+):
+    """
+    One page of a user's journals in (created_at, id) order. ``after`` is the
+    (created_at, id) of the last row of the previous page, so every page is
+    a bounded index range scan however deep into the history it is.
+    """
     try:
-        if not journal_ids or len(journal_ids) == 0:
-            return []
-        title_embedding = direct_embedding(title)
-
-        # print(f"single array is ${title_embedding[0]}")
-
-        response = db.rpc(
-            "match_journal_sections",
-            {
-                "query_embedding": title_embedding[0],
-                "journal_ids": journal_ids,
-                "match_count": 5,
-            },
-        ).execute()
-
-        # if isinstance(response, list):
-        #     return response
-        # else:
-        #     final_list = [response]
-        #     return final_list
-
-        # filter_ids = []
-        # for i in response:
-        #     filter_ids.append(i['id'])
-        # return filter_ids
-        return response
+        query = db.from_("journals").select(columns).eq("user_id", user_id)
+        if start_date:
+            query = query.gte("created_at", start_date)
+        if end_date:
+            query = query.lte("created_at", end_date)
+        if after:
+            created_at, journal_id = after
+            op = "lt" if descending else "gt"
+            query = query.or_(
+                f"created_at.{op}.{created_at},"
+                f"and(created_at.eq.{created_at},id.{op}.{journal_id})"
+            )
+        response = (
+            query.order("created_at", desc=descending)
+            .order("id", desc=descending)
+            .limit(limit)
+            .execute()
+        )
+        return response.data
 
     except Exception as e:
         raise APIException(
@@ -167,86 +255,58 @@ def filter_by_title(title: str, journal_ids: list):
         )
 
 
-def filter_by_embeddings(topic: str, journal_ids: list):
-    try:
-
-        print("Filtering journals by embeddings...")
+def encode_cursor(journal: dict) -> str:
+    """Opaque page cursor for the (created_at, id) of the last row of a page."""
+    raw = json.dumps([journal["created_at"], journal["id"]])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
 
-        if not journal_ids or len(journal_ids) == 0:
-            return []
-        topic_embedding = direct_embedding(topic)
 
-        # print(f"single array is ${topic_embedding[0]}")
-
-        response = db.rpc(
-            "match_journal_sections",
-            {
-                "query_embedding": topic_embedding[0],
-                "journal_ids": journal_ids,
-                "match_count": 5,
-            },
-        ).execute()
-        # filter_ids = []
-        # for i in response:
-        #     filter_ids.append(i['id'])
-        # return filter_ids
-
-        return response
-
-    except Exception as e:
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[str, str]]:
+    if not cursor:
+        return None
+    try:
+        created_at, journal_id = json.loads(base64.urlsafe_b64decode(cursor))
+        return datetime.fromisoformat(created_at).date().isoformat(), str(
+            UUID(journal_id)
+        )
+    except (ValueError, TypeError):
         raise APIException(
-            status_code=500,
-            detail=str(e),
-            message="Error fetching journals by semantic Search",
+            status_code=400,
+            detail="The page cursor is malformed",
+            message="Invalid Cursor",
         )
 
 
-def filter_by_moods(data, moods: list):
+def semantic_search(query_embedding, journal_ids: list, user_id: str, match_count=5):
     try:
-        if len(moods) == 0:
-            return data
-        filter_data = []
-        for j in moods:
-            for i in data:
-                mood_list = list(i["moods"].keys())
-                if j in mood_list:
-                    if i not in filter_data:
-                        filter_data.append(i)
-
-        #   if len(filter_data) == 0:
-        #       return data
-        return filter_data
+        if not journal_ids or len(journal_ids) == 0:
+            return []
+        return get_vector_store().search(
+            user_id, query_embedding, journal_ids, match_count=match_count
+        )
 
     except Exception as e:
         raise APIException(
             status_code=500,
             detail=str(e),
-            message="Error while fetching journals by moods",
+            message="Error fetching journals by semantic Search",
         )
 
 
-def filter_by_tags(tags: list, data):
-    try:
-        if not tags or len(tags) == 0:
-            return data
-
-        filter_data = []
-
-        for tag in tags:
-            for i in data:
-                if tag in i["tags"]:
-                    if i not in filter_data:
-                        filter_data.append(i)
-        if len(filter_data) == 0:
-            return data
-        return filter_data
-
-    except Exception as e:
-        raise APIException(
-            status_code=500,
-            detail=str(e),
-            message="Error while fetching journals by tags",
-        )
+def reciprocal_rank_fusion(rankings: list, limit: int, k: int = 60) -> list:
+    """
+    Merge ranked section lists by reciprocal rank fusion: a section scores
+    the sum of 1 / (k + rank) over the lists it appears in.
+    """
+    fused = {}
+    for ranking in rankings:
+        for rank, match in enumerate(ranking, start=1):
+            entry = fused.setdefault(match["id"], {"rrf_score": 0.0})
+            for key, value in match.items():
+                entry.setdefault(key, value)
+            entry["rrf_score"] += 1 / (k + rank)
+    ranked = sorted(fused.values(), key=lambda match: match["rrf_score"], reverse=True)
+    return ranked[:limit]
 
 
 # # Define tools
@@ -499,44 +559,153 @@ def filter_by_tags(tags: list, data):
 #         )
 
 
+# Journal fetches and vector searches are network bound, so the retrieval
+# steps of a chat query that do not depend on each other overlap on threads.
+retrieval_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="retrieval")
+
+# Each retriever contributes this many sections to the fusion, of which the
+# best CHAT_MATCH_COUNT are kept.
+HYBRID_CANDIDATES = 20
+CHAT_MATCH_COUNT = 5
+
+
+def _timed(timings: dict, stage: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        timings[stage] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def _fetch_chat_journals(user_id, start_date, end_date, moods, tags):
+    """
+    Journals of the date range for the chat context. Tags are guessed by the
+    LLM and may match none of the user's, so when no journal has them they
+    are dropped rather than leaving the context empty.
+    """
+    journals = get_journals_by_date(
+        user_id,
+        start_date,
+        end_date,
+        projection="chat-context",
+        moods=moods,
+        tags=tags,
+    )
+    if tags and not journals:
+        logger.info(f"No journals tagged {tags}, fetching without tags")
+        journals = get_journals_by_date(
+            user_id, start_date, end_date, projection="chat-context", moods=moods
+        )
+    return journals
+
+
 def get_Chat_data(user_query: str, user_id: str, filter_params: dict):
     """
     Function to get chat data based on user query and filter parameters.
-    It uses the query_function to fetch and filter journal data.
+    The journals for the date range are fetched while the query and title are
+    embedded in one batched call. Then BM25 and vector search over the
+    sections run concurrently and their rankings are merged with reciprocal
+    rank fusion. Per stage timings in ms are logged and returned.
     """
+    timings = {}
+    start = time.perf_counter()
     start_date = filter_params.get("date_range", {}).get("start")
     end_date = filter_params.get("date_range", {}).get("end")
     title_search = filter_params.get("title", "")
-    filtered_data = get_journals_by_date(user_id, start_date, end_date)
+    moods = filter_params.get("moods") or []
+    tags = filter_params.get("tags") or []
+    # Mood and tag filtering happens in the query, while the semantic search
+    # still covers every journal in the range, so with either the ids come
+    # separately.
+    journals_future = retrieval_executor.submit(
+        _timed,
+        timings,
+        "fetch",
+        _fetch_chat_journals,
+        user_id,
+        start_date,
+        end_date,
+        moods,
+        tags,
+    )
+    ids_future = journals_future
+    if moods or tags:
+        ids_future = retrieval_executor.submit(
+            _timed,
+            timings,
+            "fetch_ids",
+            get_journals_by_date,
+            user_id,
+            start_date,
+            end_date,
+            projection="ids",
+        )
+    vectors = _timed(
+        timings,
+        "embed",
+        embed_texts,
+        [user_query] + ([title_search] if title_search else []),
+    )
+    filtered_data = journals_future.result()
     journal_ids = []
-    for entry in filtered_data:
+    for entry in ids_future.result():
         journal_ids.append(entry["id"])
-    title_semantic_result = []
-    if title_search != "":
-        title_semantic_result = filter_by_title(title_search, journal_ids)
 
     print("Started Semantic Search : ")
     print("Journal IDs are", journal_ids)
-    semantic_result = filter_by_embeddings(user_query, journal_ids)
-
-    # print("Semantic result is", semantic_result)
+    vector_future = retrieval_executor.submit(
+        _timed,
+        timings,
+        "vector",
+        semantic_search,
+        vectors[0],
+        journal_ids,
+        user_id,
+        HYBRID_CANDIDATES,
+    )
+    lexical_future = retrieval_executor.submit(
+        _timed,
+        timings,
+        "bm25",
+        lexical_search,
+        user_id,
+        user_query,
+        journal_ids,
+        HYBRID_CANDIDATES,
+    )
+    title_future = None
+    if title_search != "":
+        title_future = retrieval_executor.submit(
+            _timed,
+            timings,
+            "title_vector",
+            semantic_search,
+            vectors[1],
+            journal_ids,
+            user_id,
+        )
 
-    if "moods" in filter_params and len(filter_params["moods"]) > 0:
-        filtered_data = filter_by_moods(filtered_data, filter_params["moods"])
-    filter_data_by_tags = []
-    if "tags" in filter_params and len(filter_params["tags"]) > 0:
-        filter_data_by_tags = filter_by_tags(filter_params["tags"], filtered_data)
+    semantic_result = _timed(
+        timings,
+        "fusion",
+        reciprocal_rank_fusion,
+        [vector_future.result(), lexical_future.result()],
+        CHAT_MATCH_COUNT,
+    )
+    title_semantic_result = title_future.result() if title_future else []
+    timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+    logger.info(f"⏱️ Chat retrieval timings (ms): {timings}")
 
-    # print("filtered data by tags is", filter_data_by_tags)
     return {
         "data": filtered_data,
         "Semantic Result": semantic_result,
         "title_search": title_semantic_result,
+        "timings": timings,
     }
 
 
 import google.generativeai as genai
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 
 genai.configure(api_key=GEMINI_KEY)
 
@@ -545,21 +714,11 @@ class ResponseSchema(BaseModel):
     message: str
 
 
-def final_response(
-    data: List[Dict], user_query: str, history: list[Dict], user_id, is_history
-) -> Dict[str, Any]:
-
-    transformed = []
-    logger.debug(history)
-    for entry in history:
-        print("this is entry", entry)
-        transformed.append({"role": "user", "parts": [{"text": entry["user_query"]}]})
-        transformed.append(
-            {"role": "model", "parts": [{"text": entry["response"]["message"]}]}
-        )
-
+def _final_prompt(
+    data: str, user_query: str, history: list[Dict], is_history, summary: str = ""
+) -> str:
     if is_history:
-        if not transformed:  # No history available
+        if not history and not summary:  # No history available
             prompt = f"""
             This is the user query = '{user_query}'.
             There is no conversation history available.
@@ -633,7 +792,10 @@ def final_response(
             - Include blockquotes for journal excerpts
 
             This is the user query = '{user_query}'.
-            Respond to this query with the help of this data: {data}.
+            Respond to this query with the help of these journal excerpts:
+
+{data}
+
             Use natural language and incorporate context from the conversation history if available.
             Always ensure the response is properly escaped JSON that can be parsed with json.loads().
 
@@ -647,76 +809,118 @@ def final_response(
 
         """
 
-    model = genai.GenerativeModel(
-        "gemini-1.5-flash",
-        safety_settings=[
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_LOW_AND_ABOVE",
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_LOW_AND_ABOVE",
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_LOW_AND_ABOVE",
-            },
+    return prompt
+
+
+def _chat_history(history: list[Dict], summary: str = "") -> list:
+    transformed = []
+    if summary:
+        # Turns folded into the summary only reach the model through it.
+        transformed.append(
             {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_MEDIUM_AND_ABOVE",
-            },
-        ],
+                "role": "user",
+                "parts": [{"text": f"Summary of our earlier conversation: {summary}"}],
+            }
+        )
+        transformed.append({"role": "model", "parts": [{"text": "Noted."}]})
+    for entry in history:
+        # Add user query as a "user" role message
+        transformed.append({"role": "user", "parts": [{"text": entry["user_query"]}]})
+        # Add response as a "model" role message
+        transformed.append(
+            {"role": "model", "parts": [{"text": entry["response"]["message"]}]}
+        )
+    return transformed
+
+
+def _stream_chunks(
+    prompt: str, history: list[Dict], summary: str = ""
+) -> Iterator[str]:
+    """Text of the Gemini answer to the prompt, chunk by chunk as generated."""
+    chat = model.start_chat(history=_chat_history(history, summary))
+    for chunk in chat.send_message(prompt, stream=True):
+        if chunk.candidates:
+            yield chunk.candidates[0].content.parts[0].text
+
+
+def _parse_final(full_response: str) -> dict:
+    cleaned = re.sub(
+        r"^```(?:json)?\s*|\s*```$", "", full_response.strip(), flags=re.MULTILINE
     )
+    parsed = json.loads(cleaned)
+    if isinstance(parsed, list):
+        combined_message = "\n".join(
+            [
+                f"{i+1}. {entry['title']} ({entry['date']}): {entry['message']}"
+                for i, entry in enumerate(parsed)
+            ]
+        )
+        print("combined message is", combined_message)
+        parsed = {
+            "title": "List of Journal Entries",
+            "date": str(today),
+            "message": combined_message,
+        }
+    return parsed
+
+
+def store_exchange(history: list[Dict], user_query: str, response, user_id):
+    """Store a turn and fold older turns into the summary in the background."""
+    turn = {"user_query": user_query, "response": response}
+    history.append(turn)
+    append_history(user_id, turn)
+    history_executor.submit(summarize_history, user_id)
+
+
+# Folds turns that left the history window into the rolling summary, off the
+# request path.
+history_executor = ThreadPoolExecutor(max_workers=2)
 
-    try:
-        transformed = []
-        for entry in history:
-            # Add user query as a "user" role message
-            transformed.append(
-                {"role": "user", "parts": [{"text": entry["user_query"]}]}
-            )
-            # Add response as a "model" role message
-            transformed.append(
-                {"role": "model", "parts": [{"text": entry["response"]["message"]}]}
-            )
 
-        chat = model.start_chat(history=transformed)
-        response = chat.send_message(prompt, stream=True)
-        full_response = ""
-        for chunk in response:
-            if chunk.candidates:
-                part = chunk.candidates[0].content.parts[0].text
-                full_response += part
-        # print("before cleaned",full_response)
-        cleaned = re.sub(
-            r"^```(?:json)?\s*|\s*```$", "", full_response.strip(), flags=re.MULTILINE
+def summarize_history(user_id: str):
+    if not claim_history_summary(user_id):
+        return
+    try:
+        found = get_turns_to_summarize(user_id)
+        if found is None:
+            return
+        summary, turns, through = found
+        exchanges = "\n".join(
+            f"User: {turn['user_query']}\nAssistant: {turn['response']['message']}"
+            for turn in turns
         )
+        prompt = f"""
+        You keep a running summary of a conversation between a user and their
+        journaling assistant. Update the summary with the exchanges below.
+        Keep facts, names, dates and open questions the user may refer back
+        to. Answer with the summary only, in at most 150 words.
 
-        # print("after cleaning ",cleaned)
-        parsed = json.loads(cleaned)
+        Current summary: {summary or "None"}
 
-        # print(f"after parsing ",parsed)
-        if isinstance(parsed, list):
-            combined_message = "\n".join(
-                [
-                    f"{i+1}. {entry['title']} ({entry['date']}): {entry['message']}"
-                    for i, entry in enumerate(parsed)
-                ]
-            )
-            print("combined message is", combined_message)
-            parsed = {
-                "title": "List of Journal Entries",
-                "date": str(today),
-                "message": combined_message,
-            }
-        # logger.info(f"this is response : {full_response}")
+        New exchanges:
+        {exchanges}
+        """
+        response = model.generate_content(prompt)
+        store_history_summary(user_id, response.text.strip(), through)
+    except Exception as e:
+        logger.exception(f"❌ Error summarizing chat history for {user_id}: {str(e)}")
+    finally:
+        release_history_summary(user_id)
+
+
+def final_response(
+    data: str,
+    user_query: str,
+    history: list[Dict],
+    user_id,
+    is_history,
+    summary: str = "",
+) -> Dict[str, Any]:
+    prompt = _final_prompt(data, user_query, history, is_history, summary)
+    try:
+        parsed = _parse_final("".join(_stream_chunks(prompt, history, summary)))
         print("parsed response is", parsed)
-        query_object = {"user_query": user_query, "response": parsed}
-        history.append(query_object)
-        dumped_history = json.dumps(history)
-        store_history(dumped_history, user_id)
-        print("parsed response is parse", parsed)
+        store_exchange(history, user_query, parsed, user_id)
         return {
             "message": parsed,
         }
@@ -724,3 +928,107 @@ def final_response(
         raise APIException(
             status_code=500, detail=str(e), message="Error generating final response"
         )
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+class MessageStream:
+    """
+    Decodes the "message" string of the JSON answer while its chunks arrive,
+    so its text can be forwarded before the answer is complete.
+    """
+
+    START = re.compile(r'"message"\s*:\s*"')
+    ESCAPES = {"b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = None
+        self.closed = False
+
+    def feed(self, chunk: str) -> str:
+        """Add a chunk of the answer, returns the message text it completes."""
+        self.buffer += chunk
+        if self.closed:
+            return ""
+        if self.position is None:
+            start = self.START.search(self.buffer)
+            if not start:
+                return ""
+            self.position = start.end()
+
+        text, i, buffer = [], self.position, self.buffer
+        while i < len(buffer):
+            char = buffer[i]
+            if char == '"':
+                self.closed = True
+                break
+            if char != "\\":
+                text.append(char)
+                i += 1
+                continue
+            # An escape sequence split across chunks waits for the next one.
+            if i + 1 >= len(buffer):
+                break
+            if buffer[i + 1] != "u":
+                text.append(self.ESCAPES.get(buffer[i + 1], buffer[i + 1]))
+                i += 2
+                continue
+            end = i + 6
+            if end <= len(buffer) and 0xD800 <= int(buffer[i + 2 : end], 16) < 0xDC00:
+                end = i + 12  # A surrogate pair, e.g. an emoji.
+            if end > len(buffer):
+                break
+            text.append(json.loads(f'"{buffer[i:end]}"'))
+            i = end
+        self.position = i
+        return "".join(text)
+
+
+def stream_final_response(
+    data: str,
+    user_query: str,
+    history: list[Dict],
+    user_id,
+    is_history,
+    summary: str = "",
+    started_at: Optional[float] = None,
+) -> Iterator[str]:
+    """
+    Server-Sent Events version of final_response. A "token" event carries
+    each piece of the message text as Gemini generates it, then a "done"
+    event the same body final_response returns plus the time to first token
+    in ms, measured from ``started_at`` (perf_counter) or the call. History
+    is stored once the answer is complete. Failures after the response has
+    started are sent as an "error" event.
+    """
+    started_at = started_at or time.perf_counter()
+    prompt = _final_prompt(data, user_query, history, is_history, summary)
+    message = MessageStream()
+    ttft_ms = None
+    try:
+        for chunk in _stream_chunks(prompt, history, summary):
+            text = message.feed(chunk)
+            if text:
+                if ttft_ms is None:
+                    ttft_ms = round((time.perf_counter() - started_at) * 1000, 1)
+                    logger.info(f"⏱️ Chat time to first token: {ttft_ms} ms")
+                yield sse_event("token", {"text": text})
+        parsed = _parse_final(message.buffer)
+        store_exchange(history, user_query, parsed, user_id)
+        total_ms = round((time.perf_counter() - started_at) * 1000, 1)
+        logger.info(f"⏱️ Chat response streamed in {total_ms} ms")
+        yield sse_event("done", {"message": parsed, "ttft_ms": ttft_ms})
+    except Exception as e:
+        logger.exception(f"❌ Error streaming final response: {str(e)}")
+        yield sse_event(
+            "error", {"message": "Error generating final response", "detail": str(e)}
+        )
+
+
+def stream_message(response: dict) -> Iterator[str]:
+    """A fixed reply as the token and done events of a streamed one."""
+    yield sse_event("token", {"text": response["message"]})
+    yield sse_event("done", {**response, "ttft_ms": None})
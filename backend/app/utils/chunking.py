@@ -0,0 +1,148 @@
+import re
+import threading
+from typing import List, Optional, Tuple
+from loguru import logger
+
+from app.core.config import CHUNK_OVERLAP_TOKENS, CHUNK_TOKENS, MODEL_VECTOR
+
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+# Room for the [CLS] and [SEP] tokens the embedding model adds to every input.
+SPECIAL_TOKENS = 2
+# Chunk size for a model whose tokenizer does not state its context.
+DEFAULT_CHUNK_TOKENS = 128
+
+
+class TokenChunker:
+    """
+    Splits text into chunks of whole sentences that fit the embedding model's
+    context. Sentences are packed greedily up to ``max_tokens``; each new chunk
+    starts with the trailing sentences of the previous one, up to
+    ``overlap_tokens``. A single sentence longer than the limit is cut on token
+    boundaries. ``max_tokens`` is capped at ``model_max_tokens``, as the model
+    would silently drop the tail of a longer chunk.
+    """
+
+    def __init__(
+        self,
+        tokenizer,
+        max_tokens: int,
+        overlap_tokens: int,
+        model_max_tokens: Optional[int] = None,
+    ):
+        if model_max_tokens and max_tokens > model_max_tokens:
+            logger.warning(
+                f"⚠️ Chunk size {max_tokens} is over the embedding model's "
+                f"{model_max_tokens} tokens, using {model_max_tokens}"
+            )
+            max_tokens = model_max_tokens
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens - SPECIAL_TOKENS
+        if not 0 <= overlap_tokens < self.max_tokens:
+            raise ValueError(
+                f"Chunk overlap must be smaller than the {self.max_tokens} tokens "
+                "a chunk holds besides the special tokens"
+            )
+        self.overlap_tokens = overlap_tokens
+
+    def _split_long_sentence(self, sentence: str, encoding) -> List[tuple]:
+        pieces = []
+        step = self.max_tokens - self.overlap_tokens
+        for start in range(0, len(encoding.offsets), step):
+            window = encoding.offsets[start : start + self.max_tokens]
+            text = sentence[window[0][0] : window[-1][1]]
+            pieces.append((text, len(window)))
+            if start + self.max_tokens >= len(encoding.offsets):
+                break
+        return pieces
+
+    def split_text(self, text: str) -> List[str]:
+        sentences = [s.strip() for s in SENTENCE_BOUNDARY.split(text) if s.strip()]
+        if not sentences:
+            return []
+        encodings = self.tokenizer.encode_batch(sentences, add_special_tokens=False)
+
+        units = []
+        for sentence, encoding in zip(sentences, encodings):
+            if len(encoding.ids) > self.max_tokens:
+                units.extend(self._split_long_sentence(sentence, encoding))
+            else:
+                units.append((sentence, len(encoding.ids)))
+
+        chunks, current, current_tokens = [], [], 0
+        for unit, tokens in units:
+            if current and current_tokens + tokens > self.max_tokens:
+                chunks.append(" ".join(text for text, _ in current))
+                overlap, overlap_tokens = [], 0
+                for previous in reversed(current):
+                    if overlap_tokens + previous[1] > self.overlap_tokens:
+                        break
+                    overlap.insert(0, previous)
+                    overlap_tokens += previous[1]
+                # Keep the overlap only if the next sentence still fits after it.
+                if overlap_tokens + tokens > self.max_tokens:
+                    overlap, overlap_tokens = [], 0
+                current, current_tokens = overlap, overlap_tokens
+            current.append((unit, tokens))
+            current_tokens += tokens
+        chunks.append(" ".join(text for text, _ in current))
+        return chunks
+
+
+def load_tokenizer() -> Tuple[object, Optional[int]]:
+    """
+    The embedding model's tokenizer and the model's context in tokens. Its
+    tokenizer.json truncates input to that context, which is turned off so
+    long texts are measured in full.
+    """
+    from tokenizers import Tokenizer
+
+    tokenizer = Tokenizer.from_pretrained(MODEL_VECTOR)
+    truncation = tokenizer.truncation
+    tokenizer.no_truncation()
+    return tokenizer, truncation["max_length"] if truncation else None
+
+
+_chunker = None
+_chunker_lock = threading.Lock()
+
+
+def get_chunker() -> TokenChunker:
+    """
+    Chunker on the embedding model's tokenizer, loaded on first use. Chunks
+    fill the model's context unless CHUNK_TOKENS asks for less.
+    """
+    global _chunker
+    if _chunker is None:
+        with _chunker_lock:
+            if _chunker is None:
+                tokenizer, model_max_tokens = load_tokenizer()
+                _chunker = TokenChunker(
+                    tokenizer,
+                    CHUNK_TOKENS or model_max_tokens or DEFAULT_CHUNK_TOKENS,
+                    CHUNK_OVERLAP_TOKENS,
+                    model_max_tokens,
+                )
+    return _chunker
+
+
+def chunk_text(text: str) -> List[str]:
+    return get_chunker().split_text(text)
+
+
+def count_tokens(texts: List[str]) -> List[int]:
+    """Tokens of each text under the embedding model's tokenizer."""
+    if not texts:
+        return []
+    encodings = get_chunker().tokenizer.encode_batch(texts, add_special_tokens=False)
+    return [len(encoding.ids) for encoding in encodings]
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """The longest prefix of the text with at most ``max_tokens`` tokens."""
+    if max_tokens <= 0:
+        return ""
+    encoding = get_chunker().tokenizer.encode(text, add_special_tokens=False)
+    if len(encoding.ids) <= max_tokens:
+        return text
+    return text[: encoding.offsets[max_tokens - 1][1]]
@@ -0,0 +1,118 @@
+import re
+from typing import Dict, List
+from loguru import logger
+
+from app.core.config import CHAT_CONTEXT_TOKENS
+from app.utils.chatbot_utils import reciprocal_rank_fusion
+from app.utils.chunking import count_tokens, truncate_tokens
+
+# A journal is only added as a cut down excerpt when at least this many
+# tokens of its content still fit.
+MIN_EXCERPT_TOKENS = 32
+
+
+def _normalize(text: str) -> str:
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def _header(journal: dict) -> str:
+    if not journal:
+        return "Journal entry"
+    moods = [mood for mood in journal.get("moods") or {} if mood != "dominant"]
+    header = f"Journal \"{journal.get('title') or 'Untitled'}\""
+    header += f" ({str(journal.get('created_at', ''))[:10] or 'unknown date'})"
+    if moods:
+        header += f", moods: {', '.join(moods)}"
+    return header
+
+
+def _distinct_sections(ranked: List[dict]) -> List[dict]:
+    """
+    Ranked sections without repeats. Overlapping chunks share sentences, so a
+    section contained in a better ranked one of the same journal, or the
+    other way round, is dropped as well.
+    """
+    kept = []
+    for section in ranked:
+        text = _normalize(section.get("text") or "")
+        if not text:
+            continue
+        if any(
+            other["journal_id"] == section["journal_id"]
+            and (text in other["normalized"] or other["normalized"] in text)
+            for other in kept
+        ):
+            continue
+        kept.append({**section, "normalized": text})
+    return kept
+
+
+def build_context(
+    journals: List[Dict],
+    semantic_results: List[Dict],
+    title_results: List[Dict],
+    max_tokens: int = CHAT_CONTEXT_TOKENS,
+) -> dict:
+    """
+    Journal context for the chat prompt within ``max_tokens`` tokens. The
+    sections found by hybrid and title search are fused by rank, deduplicated
+    and packed best first, grouped under their journal's title, date and
+    moods. Remaining room goes to the other journals of the date range, newest
+    first, cut to fit. Tokens are counted with the embedding model's
+    tokenizer, a close stand in for Gemini's. Returns the context text and
+    what went into it.
+    """
+    by_id = {journal["id"]: journal for journal in journals}
+    ranked = _distinct_sections(
+        reciprocal_rank_fusion(
+            [semantic_results, title_results],
+            len(semantic_results) + len(title_results),
+        )
+    )
+
+    groups: Dict[str, dict] = {}
+    lines = [f"- {section['text'].strip()}" for section in ranked]
+    headers = [_header(by_id.get(section["journal_id"])) for section in ranked]
+    line_tokens = count_tokens(lines)
+    header_tokens = count_tokens(headers)
+    used = sections = 0
+    for line, header, tokens, extra, section in zip(
+        lines, headers, line_tokens, header_tokens, ranked
+    ):
+        cost = tokens + (0 if section["journal_id"] in groups else extra)
+        if used + cost > max_tokens:
+            continue
+        group = groups.setdefault(
+            section["journal_id"], {"header": header, "lines": []}
+        )
+        group["lines"].append(line)
+        used += cost
+        sections += 1
+
+    others = sorted(
+        (journal for journal in journals if journal["id"] not in groups),
+        key=lambda journal: str(journal.get("created_at", "")),
+        reverse=True,
+    )
+    for journal in others:
+        header = _header(journal)
+        room = max_tokens - used - count_tokens([header])[0] - 1
+        if room < MIN_EXCERPT_TOKENS:
+            break
+        excerpt = truncate_tokens((journal.get("content") or "").strip(), room)
+        if not excerpt:
+            continue
+        groups[journal["id"]] = {"header": header, "lines": [f"- {excerpt}"]}
+        used += sum(count_tokens([header, f"- {excerpt}"]))
+
+    context = "\n\n".join(
+        "\n".join([group["header"], *group["lines"]]) for group in groups.values()
+    )
+    stats = {
+        "tokens": count_tokens([context])[0] if context else 0,
+        "sections": sections,
+        "journals": len(groups),
+        "candidates": len(semantic_results) + len(title_results),
+    }
+    logger.info(f"✅ Built chat context: {stats}")
+    return {"context": context, **stats}
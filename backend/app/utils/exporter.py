@@ -0,0 +1,61 @@
+import json
+from typing import Iterator, List, Optional
+
+from app.core.exceptions import APIException
+from app.utils.chatbot_utils import get_journal_page
+
+EXPORT_FIELDS = (
+    "id",
+    "created_at",
+    "title",
+    "content",
+    "rich_text",
+    "moods",
+    "tags",
+    "embedding",
+    "title_embedding",
+)
+# The vectors are by far the largest columns and only useful to re-create the
+# same index, so they are left out unless asked for.
+DEFAULT_EXPORT_FIELDS = tuple(
+    field for field in EXPORT_FIELDS if field not in ("embedding", "title_embedding")
+)
+VECTOR_FIELDS = ("embedding", "title_embedding")
+EXPORT_PAGE_SIZE = 200
+
+
+def parse_export_fields(fields: Optional[str]) -> List[str]:
+    if not fields:
+        return list(DEFAULT_EXPORT_FIELDS)
+    selected = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in selected if field not in EXPORT_FIELDS]
+    if unknown or not selected:
+        raise APIException(
+            status_code=400,
+            detail=f"Export fields must be among {', '.join(EXPORT_FIELDS)}",
+            message="Invalid Export Fields",
+        )
+    return selected
+
+
+def iter_journal_export(user_id: str, fields: List[str]) -> Iterator[str]:
+    """
+    Yield a user's journals as NDJSON lines, oldest first, reading one keyset
+    page at a time so memory stays constant however many entries are exported.
+    The lines can be fed back to /journals/import.
+    """
+    # The cursor columns are always read, and dropped again if not selected.
+    columns = list(dict.fromkeys(["id", "created_at", *fields]))
+    after = None
+    while True:
+        page = get_journal_page(
+            user_id, ",".join(columns), after=after, limit=EXPORT_PAGE_SIZE
+        )
+        for journal in page:
+            for field in VECTOR_FIELDS:
+                if isinstance(journal.get(field), str):
+                    journal[field] = json.loads(journal[field])
+            yield json.dumps({field: journal.get(field) for field in fields}) + "\n"
+        if len(page) < EXPORT_PAGE_SIZE:
+            return
+        after = (page[-1]["created_at"], page[-1]["id"])
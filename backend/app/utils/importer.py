@@ -0,0 +1,261 @@
+from datetime import date, datetime, time, timezone
+import html
+import json
+import os
+import re
+import tempfile
+from typing import AsyncIterator, Iterator, List, Optional, Tuple
+import zipfile
+from loguru import logger
+
+from app.core.config import IMPORT_BATCH_SIZE, IMPORT_MAX_BYTES
+from app.core.connection import db
+from app.core.exceptions import APIException
+from app.db.schemas.journal import DraftCreate
+from app.utils.ingestion import journal_id_for, prepare_journals
+from app.utils.jobs import report_progress
+from app.utils.section_index import sections_changed
+from app.utils.utils import insert_journals_with_sections
+
+IMPORT_FORMATS = ("ndjson", "markdown")
+
+# A single NDJSON line or archive member larger than this is rejected on its
+# own, so one bad entry cannot pull an unbounded amount of data into memory.
+MAX_ENTRY_BYTES = 1024 * 1024
+MAX_REPORTED_ERRORS = 20
+
+FRONT_MATTER = re.compile(r"\A---[ \t]*\r?\n(.*?)\r?\n---[ \t]*(?:\r?\n|\Z)", re.S)
+HEADING = re.compile(r"\A\s*#[ \t]+(.+?)[ \t]*(?:\r?\n|\Z)")
+DATE_IN_NAME = re.compile(r"(\d{4}-\d{2}-\d{2})")
+
+
+async def save_upload(stream: AsyncIterator[bytes], file_format: str) -> str:
+    """
+    Spool a request body to a temporary file as it arrives, so an upload of
+    any size is never held in memory. Returns the path of the file.
+    """
+    suffix = ".zip" if file_format == "markdown" else ".ndjson"
+    size = 0
+    with tempfile.NamedTemporaryFile(
+        prefix="mindsync-import-", suffix=suffix, delete=False
+    ) as upload:
+        try:
+            async for chunk in stream:
+                size += len(chunk)
+                if size > IMPORT_MAX_BYTES:
+                    raise APIException(
+                        status_code=413,
+                        detail=f"Imports are limited to {IMPORT_MAX_BYTES} bytes",
+                        message="Import Too Large",
+                    )
+                upload.write(chunk)
+        except Exception:
+            upload.close()
+            remove_upload(upload.name)
+            raise
+
+    if size == 0 or (file_format == "markdown" and not zipfile.is_zipfile(upload.name)):
+        remove_upload(upload.name)
+        raise APIException(
+            status_code=400,
+            detail="Expected a non-empty NDJSON file or a zip archive of Markdown files",
+            message="Invalid Import File",
+        )
+    return upload.name
+
+
+def remove_upload(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def _parse_date(value) -> date:
+    if not value:
+        raise ValueError("entry has no date")
+    return date.fromisoformat(str(value)[:10])
+
+
+def _to_rich_text(content: str) -> str:
+    paragraphs = [p.strip() for p in re.split(r"\n\s*\n", content) if p.strip()]
+    return "".join(
+        f"<p>{html.escape(p).replace(chr(10), '<br>')}</p>" for p in paragraphs
+    )
+
+
+def _make_entry(
+    journal_date: date, title: Optional[str], content: str, tags: list, rich_text=None
+) -> dict:
+    content = content.strip()
+    if not content:
+        raise ValueError("entry has no content")
+    return {
+        "date": journal_date.isoformat(),
+        "title": (title or "").strip() or journal_date.strftime("%d %B, %Y"),
+        "content": content,
+        "tags": [tag["text"] if isinstance(tag, dict) else str(tag) for tag in tags],
+        "rich_text": rich_text or _to_rich_text(content),
+    }
+
+
+def _entry_from_json(obj) -> dict:
+    """One NDJSON line, in the shape of the journals export or a DraftRequest."""
+    if not isinstance(obj, dict):
+        raise ValueError("entry is not a JSON object")
+    return _make_entry(
+        _parse_date(obj.get("date") or obj.get("created_at")),
+        obj.get("title"),
+        obj.get("content") or obj.get("plain_text") or "",
+        obj.get("tags") or [],
+        obj.get("rich_text"),
+    )
+
+
+def _entry_from_markdown(name: str, text: str) -> dict:
+    """
+    A Markdown file with optional front matter (date, title, tags). Without a
+    title the first heading is used, without a date the file name must contain
+    one, e.g. ``2024-03-01.md``.
+    """
+    meta = {}
+    front_matter = FRONT_MATTER.match(text)
+    if front_matter:
+        for line in front_matter.group(1).splitlines():
+            key, sep, value = line.partition(":")
+            if sep:
+                meta[key.strip().lower()] = value.strip().strip("'\"")
+        text = text[front_matter.end() :]
+
+    title = meta.get("title")
+    heading = HEADING.match(text)
+    if heading and not title:
+        title = heading.group(1).lstrip("#").strip()
+        text = text[heading.end() :]
+
+    name_date = DATE_IN_NAME.search(os.path.basename(name))
+    tags = [
+        tag.strip().strip("'\"") for tag in meta.get("tags", "").strip("[]").split(",")
+    ]
+    return _make_entry(
+        _parse_date(meta.get("date") or (name_date and name_date.group(1))),
+        title,
+        text,
+        [tag for tag in tags if tag],
+    )
+
+
+ParsedRecord = Tuple[float, Optional[dict], Optional[str]]
+
+
+def _iter_ndjson(path: str) -> Iterator[ParsedRecord]:
+    """Yield (fraction of the file read, entry, error) for each line."""
+    total = os.path.getsize(path)
+    position = 0
+    with open(path, "rb") as upload:
+        line_number = 0
+        while True:
+            line = upload.readline(MAX_ENTRY_BYTES + 1)
+            if not line:
+                break
+            line_number += 1
+            position += len(line)
+            if len(line) > MAX_ENTRY_BYTES and not line.endswith(b"\n"):
+                # Skip the rest of the oversized line without keeping it.
+                while line and not line.endswith(b"\n"):
+                    line = upload.readline(MAX_ENTRY_BYTES)
+                    position += len(line)
+                yield position / total, None, f"line {line_number}: entry too large"
+                continue
+            if not line.strip():
+                continue
+            try:
+                yield position / total, _entry_from_json(json.loads(line)), None
+            except ValueError as e:
+                yield position / total, None, f"line {line_number}: {e}"
+
+
+def _iter_markdown(path: str) -> Iterator[ParsedRecord]:
+    """Yield (fraction of the files read, entry, error) for each archive member."""
+    with zipfile.ZipFile(path) as archive:
+        members = [
+            info
+            for info in archive.infolist()
+            if not info.is_dir()
+            and info.filename.lower().endswith((".md", ".markdown"))
+            and not info.filename.startswith("__MACOSX/")
+        ]
+        for index, info in enumerate(members, start=1):
+            fraction = index / len(members)
+            with archive.open(info) as member:
+                data = member.read(MAX_ENTRY_BYTES + 1)
+            if len(data) > MAX_ENTRY_BYTES:
+                yield fraction, None, f"{info.filename}: entry too large"
+                continue
+            try:
+                text = data.decode("utf-8-sig")
+                yield fraction, _entry_from_markdown(info.filename, text), None
+            except ValueError as e:
+                yield fraction, None, f"{info.filename}: {e}"
+
+
+def _import_batch(user_id: str, entries: List[dict], counts: dict):
+    drafts = [DraftCreate(user_id=user_id, **entry) for entry in entries]
+    prepared = prepare_journals(
+        drafts,
+        [journal_id_for(user_id, draft.date) for draft in drafts],
+        [
+            datetime.combine(date.fromisoformat(draft.date), time(), timezone.utc)
+            for draft in drafts
+        ],
+    )
+    inserted = insert_journals_with_sections(
+        [journal for journal, _ in prepared],
+        [section for _, sections in prepared for section in sections],
+        db,
+    )
+    if inserted:
+        sections_changed(user_id)
+    counts["imported"] += inserted
+    counts["skipped"] += len(drafts) - inserted
+
+
+def import_journals(user_id: str, path: str, file_format: str) -> dict:
+    """
+    Import an uploaded NDJSON file or Markdown archive, one entry in memory at
+    a time. Entries are chunked, embedded, classified and inserted in batches
+    of IMPORT_BATCH_SIZE. Days that already have a journal are skipped,
+    whether it was submitted, imported or stored by an earlier attempt of this
+    import. Progress is stored on the job record per batch.
+    """
+    records = _iter_ndjson(path) if file_format == "ndjson" else _iter_markdown(path)
+    counts = {"parsed": 0, "imported": 0, "skipped": 0, "invalid": 0}
+    errors, seen_dates, batch = [], set(), []
+    report_progress(percent=0.0, **counts)
+
+    for fraction, entry, error in records:
+        if error:
+            counts["invalid"] += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append(error)
+            continue
+        counts["parsed"] += 1
+        # One journal per day, the first entry for a date wins.
+        if entry["date"] in seen_dates:
+            counts["skipped"] += 1
+            continue
+        seen_dates.add(entry["date"])
+        batch.append(entry)
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            _import_batch(user_id, batch, counts)
+            batch = []
+            report_progress(percent=round(100 * fraction, 1), **counts)
+
+    if batch:
+        _import_batch(user_id, batch, counts)
+    report_progress(percent=100.0, **counts)
+    logger.success(
+        f"✅ Imported {counts['imported']} journals for user {user_id}, "
+        f"skipped {counts['skipped']}, {counts['invalid']} invalid entries"
+    )
+    return {**counts, "errors": errors}
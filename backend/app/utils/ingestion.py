@@ -0,0 +1,271 @@
+from datetime import date, datetime, timezone
+import hashlib
+import json
+from typing import List, Optional, Tuple
+from uuid import UUID, uuid5
+import numpy as np
+from loguru import logger
+
+from app.core.connection import db, redis_client
+from app.core.exceptions import APIException
+from app.db.schemas.journal import DraftCreate, Journal, JournalSection
+from app.utils.chunking import chunk_text
+from app.utils.utils import (
+    classify_texts,
+    embed_texts,
+    insert_journal_with_sections,
+    parse_vector,
+    pool_embeddings,
+    update_journal_with_sections,
+)
+from app.utils.section_index import sections_added, sections_changed
+
+# Journal ids are derived from the user and the draft date, and section ids from
+# the journal id and section number, so a retried submit writes the same rows.
+JOURNAL_NAMESPACE = UUID("754b905d-32d3-4a32-b15f-2ad0abc34bbe")
+
+
+def journal_id_for(user_id: str, journal_date: str) -> str:
+    return str(uuid5(JOURNAL_NAMESPACE, f"{user_id}:{journal_date}"))
+
+
+def section_id_for(journal_id: str, section_number: int) -> str:
+    return str(uuid5(UUID(journal_id), str(section_number)))
+
+
+def aggregate_moods(chunk_moods: List[dict]) -> dict:
+    """
+    Journal level moods from per chunk results: every chunk's top mood scores
+    are averaged over the number of chunks and the best three are kept.
+    """
+    moods = {}
+    for chunk in chunk_moods:
+        for mood, score in chunk.items():
+            if mood != "dominant":
+                moods[mood] = moods.get(mood, 0) + score
+
+    if not moods:
+        return {"neutral": 0.0}
+
+    num_chunks = len(chunk_moods)
+    moods = {mood: round(score / num_chunks, 4) for mood, score in moods.items()}
+    return dict(sorted(moods.items(), key=lambda x: x[1], reverse=True)[:3])
+
+
+def prepare_journals(
+    drafts: List[DraftCreate], journal_ids: List[str], created_at: List[datetime]
+) -> List[Tuple[Journal, List[JournalSection]]]:
+    """
+    Run all model inference for a batch of drafts and build each journal row
+    and its sections. Every chunk of every draft goes through the mood
+    classifier exactly once, and the chunk, title and pooled journal vectors
+    all come from a single batched embedding call. Vectors stay float32 arrays
+    until the rows are built.
+    """
+    if not drafts:
+        return []
+    draft_chunks = [chunk_text(draft.content) for draft in drafts]
+    all_moods = classify_texts([chunk for chunks in draft_chunks for chunk in chunks])
+
+    # An entry too short to split is pooled from its full text, as before.
+    pooled_texts = [
+        chunks or [draft.content] for draft, chunks in zip(drafts, draft_chunks)
+    ]
+    vectors = embed_texts(
+        [text for texts in pooled_texts for text in texts]
+        + [draft.title for draft in drafts]
+    )
+    title_vectors = vectors[-len(drafts) :]
+
+    prepared, vector_offset, mood_offset = [], 0, 0
+    for draft, chunks, texts, title_vector, journal_id, journal_created_at in zip(
+        drafts, draft_chunks, pooled_texts, title_vectors, journal_ids, created_at
+    ):
+        chunk_vectors = vectors[vector_offset : vector_offset + len(texts)]
+        chunk_moods = all_moods[mood_offset : mood_offset + len(chunks)]
+        vector_offset += len(texts)
+        mood_offset += len(chunks)
+
+        sections = [
+            JournalSection(
+                id=section_id_for(journal_id, section_number),
+                journal_id=journal_id,
+                section_number=section_number,
+                text=chunk,
+                moods=moods,
+                embedding=vector.tolist(),
+                created_at=journal_created_at.date(),
+            )
+            for section_number, (chunk, moods, vector) in enumerate(
+                zip(chunks, chunk_moods, chunk_vectors)
+            )
+        ]
+        journal = Journal(
+            id=journal_id,
+            user_id=draft.user_id,
+            content=draft.content,
+            moods=aggregate_moods(chunk_moods),
+            tags=draft.tags,
+            embedding=pool_embeddings(chunk_vectors).tolist(),
+            title=draft.title,
+            title_embedding=title_vector.tolist(),
+            created_at=journal_created_at,
+            rich_text=draft.rich_text,
+        )
+        prepared.append((journal, sections))
+    return prepared
+
+
+def prepare_journal(
+    draft: DraftCreate, journal_id: str, created_at: datetime
+) -> Tuple[Journal, List[JournalSection]]:
+    return prepare_journals([draft], [journal_id], [created_at])[0]
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def edit_journal(
+    journal_id: str,
+    user_id: str,
+    content: str,
+    title: str,
+    tags: list,
+    rich_text: str,
+) -> dict:
+    """
+    Re-chunk an edited journal and run inference only for chunks whose content
+    hash is not already stored in journal_sections. The pooled embedding and
+    mood aggregate are recomputed from the per section vectors and scores.
+    """
+    stored_journal = (
+        db.table("journals")
+        .select("id, title, title_embedding, created_at")
+        .eq("id", journal_id)
+        .eq("user_id", user_id)
+        .execute()
+    )
+    if not stored_journal.data:
+        raise APIException(
+            status_code=404,
+            detail=f"No journal found with id {journal_id}",
+            message="Journal Not Found",
+        )
+    stored_journal = stored_journal.data[0]
+    stored_sections = (
+        db.table("journal_sections")
+        .select("id, text, moods, embedding")
+        .eq("journal_id", journal_id)
+        .execute()
+    ).data
+    by_hash = {content_hash(section["text"]): section for section in stored_sections}
+    by_id = {section["id"]: section for section in stored_sections}
+
+    chunks = chunk_text(content)
+    hashes = [content_hash(chunk) for chunk in chunks]
+    new_chunks = list(
+        {h: c for h, c in zip(hashes, chunks) if h not in by_hash}.values()
+    )
+
+    title_changed = title != stored_journal["title"]
+    new_moods = dict(zip(map(content_hash, new_chunks), classify_texts(new_chunks)))
+    vectors = embed_texts(new_chunks + ([title] if title_changed else []))
+    new_vectors = dict(zip(map(content_hash, new_chunks), vectors))
+    if title_changed:
+        title_vector = vectors[-1]
+    else:
+        title_vector = parse_vector(stored_journal["title_embedding"])
+
+    section_moods, section_vectors, changed_sections = [], [], []
+    for section_number, (chunk, chunk_hash) in enumerate(zip(chunks, hashes)):
+        if chunk_hash in by_hash:
+            moods = by_hash[chunk_hash]["moods"]
+            vector = parse_vector(by_hash[chunk_hash]["embedding"])
+        else:
+            moods, vector = new_moods[chunk_hash], new_vectors[chunk_hash]
+        section_moods.append(moods)
+        section_vectors.append(vector)
+
+        section_id = section_id_for(journal_id, section_number)
+        stored = by_id.get(section_id)
+        if stored and content_hash(stored["text"]) == chunk_hash:
+            continue  # Same text already stored under this id.
+        changed_sections.append(
+            JournalSection(
+                id=section_id,
+                journal_id=journal_id,
+                section_number=section_number,
+                text=chunk,
+                moods=moods,
+                embedding=vector.tolist(),
+                created_at=stored_journal["created_at"],
+            )
+        )
+
+    if section_vectors:
+        pooled = pool_embeddings(np.stack(section_vectors))
+    else:
+        pooled = embed_texts([content])[0]
+    journal = {
+        "id": journal_id,
+        "user_id": user_id,
+        "content": content,
+        "moods": aggregate_moods(section_moods),
+        "tags": tags,
+        "embedding": pooled.tolist(),
+        "title": title,
+        "title_embedding": title_vector.tolist(),
+        "rich_text": rich_text,
+    }
+    keep_section_ids = [section_id_for(journal_id, i) for i in range(len(chunks))]
+    update_journal_with_sections(journal, changed_sections, keep_section_ids, db)
+    sections_changed(user_id)
+    logger.info(
+        f"✅ Edited journal {journal_id}: inferred {len(new_chunks)} new chunks, "
+        f"rewrote {len(changed_sections)} of {len(chunks)} sections"
+    )
+    return {
+        "id": journal_id,
+        "sections": len(chunks),
+        "inferred_sections": len(new_chunks),
+        "rewritten_sections": len(changed_sections),
+    }
+
+
+def submit_draft(user_id: str, journal_date: Optional[str] = None):
+    now = datetime.now(timezone.utc)
+    today_key = journal_date or date.today().isoformat()
+    draft_data = redis_client.get(f"Draft:{user_id}:{today_key}")
+    if not draft_data:
+        raise APIException(
+            status_code=400,
+            detail="No valid draft data found",
+            message="No Drafts Processed",
+        )
+    try:
+        draft = DraftCreate(**json.loads(draft_data))
+    except ValueError as ve:
+        # A malformed draft fails the same way on every attempt.
+        logger.error(f"Invalid draft: {str(ve)}")
+        raise APIException(status_code=400, detail=str(ve), message="Invalid Draft")
+
+    try:
+        journal_id = journal_id_for(user_id, today_key)
+        logger.info(f"Draft Data: {draft}, User ID: {user_id}")
+
+        journal, sections = prepare_journal(draft, journal_id, now)
+        insert_journal_with_sections(journal, sections, db)
+        sections_added(user_id, sections)
+        logger.info(f"✅ Processed draft for {now.date()} and stored in Supabase")
+
+        redis_client.delete(f"Draft:{user_id}:{today_key}")
+        return user_id
+
+    except Exception as e:
+        # Inference, Supabase and Redis errors are usually transient, a 5xx
+        # lets the job retry them.
+        logger.error(f"Error processing draft: {str(e)}")
+        raise APIException(
+            status_code=500, detail=str(e), message="Error Processing Draft"
+        )
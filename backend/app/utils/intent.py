@@ -0,0 +1,110 @@
+from functools import lru_cache
+from typing import Optional, Tuple
+import numpy as np
+
+from app.utils.utils import embed_texts
+
+# Labeled example prompts per intent. "journal" asks about the user's entries,
+# "history" about the conversation so far and "unrelated" is anything the
+# chatbot turns away. benchmarks/intent.py scores the classifier on other,
+# held-out queries.
+INTENT_EXAMPLES = {
+    "journal": [
+        "How did I feel last week?",
+        "What did I write about my exams?",
+        "When was I happiest this month?",
+        "Show me my entries from yesterday",
+        "What did I do on my birthday?",
+        "Was I stressed about work in March?",
+        "Summarize my journals from last month",
+        "Find the day I went hiking",
+        "What made me sad recently?",
+        "How has my mood changed over time?",
+        "Did I mention my sister in any entry?",
+        "What was I grateful for this year?",
+        "Which days did I go to the gym?",
+        "Tell me about my trip to Goa",
+        "What did I learn in class on Monday?",
+        "How was my week?",
+        "What were my thoughts about the interview?",
+        "Remind me what happened at the party",
+        "List the entries where I felt anxious",
+        "What did I say about my project deadline?",
+    ],
+    "history": [
+        "What did I ask you earlier?",
+        "Can you repeat your last answer?",
+        "What did you just say?",
+        "Summarize our conversation so far",
+        "Go back to what you told me before",
+        "Explain your previous response in more detail",
+        "What was my first question?",
+        "You mentioned something earlier, what was it?",
+        "Can you rephrase that?",
+        "Tell me more about what you said",
+        "Shorten your last reply",
+        "What were we talking about?",
+    ],
+    "unrelated": [
+        "Solve 2x + 3 = 11",
+        "What is the derivative of x squared?",
+        "Write a Python function to reverse a list",
+        "Tell me a joke",
+        "What is the capital of France?",
+        "Who won the world cup in 2011?",
+        "Translate hello into Spanish",
+        "What's the weather like tomorrow?",
+        "Give me a recipe for pancakes",
+        "Explain how a binary search tree works",
+        "Write a poem about the ocean",
+        "How many planets are in the solar system?",
+        "Fix this SQL query for me",
+        "What is the meaning of life?",
+        "Recommend a good movie",
+        "How do I center a div in CSS?",
+    ],
+}
+INTENTS = tuple(INTENT_EXAMPLES)
+
+# A query is only classified when its nearest centroid is at least this much
+# closer than the runner up, see benchmarks/intent.py for the trade-off
+# between coverage and accuracy.
+INTENT_MARGIN = 0.08
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+@lru_cache(maxsize=None)
+def intent_centroids() -> np.ndarray:
+    """One normalized mean embedding per intent, in INTENTS order."""
+    texts = [text for intent in INTENTS for text in INTENT_EXAMPLES[intent]]
+    vectors = _normalize(embed_texts(texts))
+    centroids, start = [], 0
+    for intent in INTENTS:
+        count = len(INTENT_EXAMPLES[intent])
+        centroids.append(vectors[start : start + count].mean(axis=0))
+        start += count
+    return _normalize(np.stack(centroids))
+
+
+def intent_scores(user_query: str) -> np.ndarray:
+    """Cosine similarity of the query to each intent centroid."""
+    query = _normalize(embed_texts([user_query])[0])
+    return intent_centroids() @ query
+
+
+def classify_intent(
+    user_query: str, margin: float = INTENT_MARGIN
+) -> Tuple[Optional[str], float]:
+    """
+    Nearest-centroid intent of a chat query and its margin over the runner up.
+    The intent is None when the margin is below ``margin``, leaving the
+    decision to the LLM. The query embedding is cached, so retrieval reuses it.
+    """
+    scores = intent_scores(user_query)
+    second, best = np.argsort(scores)[-2:]
+    confidence = float(scores[best] - scores[second])
+    return (INTENTS[best] if confidence >= margin else None), confidence
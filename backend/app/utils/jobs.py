@@ -0,0 +1,175 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+import json
+import threading
+import time
+from typing import Callable, Optional
+from loguru import logger
+
+from app.core.config import IMPORT_WORKERS, INGEST_MAX_RETRIES, INGEST_WORKERS
+from app.core.connection import redis_client
+from app.core.exceptions import APIException
+
+JOB_TTL_SECONDS = 24 * 60 * 60
+# Jobs of a live process refresh a heartbeat key every JOB_HEARTBEAT_SECONDS.
+# A queued or running job whose heartbeat expired was lost with its process.
+JOB_HEARTBEAT_SECONDS = 15
+JOB_STALE_SECONDS = 60
+
+# Model inference and Supabase calls are blocking, so jobs run on bounded
+# pools of worker threads instead of the event loop. Each API worker process
+# runs at most INGEST_WORKERS draft submissions and IMPORT_WORKERS imports at
+# once, so long imports never hold up submissions. Job state lives in Redis so
+# any worker can answer a status request.
+pools = {
+    "ingest": ThreadPoolExecutor(
+        max_workers=INGEST_WORKERS, thread_name_prefix="ingest"
+    ),
+    "import": ThreadPoolExecutor(
+        max_workers=IMPORT_WORKERS, thread_name_prefix="import"
+    ),
+}
+
+# Ids of the jobs queued or running in this process.
+_active = set()
+_active_lock = threading.Lock()
+
+# The job record of the task running on the current worker thread.
+_current = threading.local()
+
+
+def _job_key(job_id: str) -> str:
+    return f"Job:{job_id}"
+
+
+def _heartbeat_key(job_id: str) -> str:
+    return f"JobHeartbeat:{job_id}"
+
+
+def get_job(job_id: str) -> Optional[dict]:
+    data = redis_client.get(_job_key(job_id))
+    if not data:
+        return None
+    job = json.loads(data)
+    if job["status"] in ("queued", "running") and not redis_client.exists(
+        _heartbeat_key(job_id)
+    ):
+        job.update(status="failed", error="Job was interrupted by a server restart")
+        _save_job(job)
+        logger.warning(f"⚠️ Job {job_id} lost its worker, marked failed")
+    return job
+
+
+def _save_job(job: dict):
+    job["updated_at"] = datetime.now(timezone.utc).isoformat()
+    redis_client.set(_job_key(job["job_id"]), json.dumps(job), ex=JOB_TTL_SECONDS)
+
+
+def _beat(job_ids):
+    pipe = redis_client.pipeline(transaction=False)
+    for job_id in job_ids:
+        pipe.set(_heartbeat_key(job_id), 1, ex=JOB_STALE_SECONDS)
+    pipe.execute()
+
+
+def _heartbeat_loop():
+    while True:
+        time.sleep(JOB_HEARTBEAT_SECONDS)
+        with _active_lock:
+            job_ids = list(_active)
+        if not job_ids:
+            continue
+        try:
+            _beat(job_ids)
+        except Exception as e:
+            logger.warning(f"⚠️ Job heartbeat failed: {str(e)}")
+
+
+threading.Thread(target=_heartbeat_loop, name="job-heartbeat", daemon=True).start()
+
+
+def _is_permanent(error: Exception) -> bool:
+    # Client errors, e.g. a missing draft, fail the same way on every attempt.
+    return isinstance(error, APIException) and 400 <= error.status_code < 500
+
+
+def report_progress(**progress):
+    """
+    Store progress counters on the record of the job running on this thread,
+    so long tasks can be followed while they run. A no-op outside a job.
+    """
+    job = getattr(_current, "job", None)
+    if job is not None:
+        job["progress"] = progress
+        _save_job(job)
+
+
+def _run_job(job: dict, task: Callable, args: tuple, cleanup: Optional[Callable]):
+    _current.job = job
+    try:
+        for attempt in range(1, INGEST_MAX_RETRIES + 1):
+            job.update(status="running", attempts=attempt)
+            _save_job(job)
+            try:
+                job["result"] = task(*args)
+                job.update(status="done", error=None)
+                _save_job(job)
+                logger.success(f"✅ Job {job['job_id']} finished on attempt {attempt}")
+                return
+            except Exception as e:
+                error = e.detail if isinstance(e, APIException) else str(e)
+                job["error"] = error
+                logger.error(
+                    f"❌ Job {job['job_id']} attempt {attempt} failed: {error}"
+                )
+                if _is_permanent(e):
+                    break
+                if attempt < INGEST_MAX_RETRIES:
+                    time.sleep(2**attempt)
+        job["status"] = "failed"
+        _save_job(job)
+    finally:
+        _current.job = None
+        with _active_lock:
+            _active.discard(job["job_id"])
+        redis_client.delete(_heartbeat_key(job["job_id"]))
+        if cleanup:
+            cleanup()
+
+
+def enqueue_job(
+    job_id: str,
+    user_id: str,
+    task: Callable,
+    *args,
+    cleanup: Optional[Callable] = None,
+    pool: str = "ingest",
+) -> dict:
+    """
+    Queue ``task(*args)`` on one of the ``pools`` and return its job record.
+    A job id that is already queued or running is returned as is, so a double
+    submit does not process the same draft twice. ``cleanup`` runs once after
+    the last attempt, whether the job finished or failed. Client errors
+    (APIException 4xx) are not retried.
+    """
+    existing = get_job(job_id)
+    if existing and existing["status"] in ("queued", "running"):
+        return existing
+
+    job = {
+        "job_id": job_id,
+        "user_id": user_id,
+        "status": "queued",
+        "attempts": 0,
+        "error": None,
+        "result": None,
+        "progress": None,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+    }
+    with _active_lock:
+        _active.add(job_id)
+    _beat([job_id])
+    _save_job(job)
+    pools[pool].submit(_run_job, dict(job), task, args, cleanup)
+    logger.info(f"📥 Job {job_id} queued for user {user_id}")
+    return job
@@ -0,0 +1,114 @@
+from collections import Counter, defaultdict
+import heapq
+import math
+import threading
+from typing import Iterable, List
+
+from app.core.config import LOCAL_INDEX_MAX_USERS
+from app.db.schemas.journal import JournalSection
+from app.utils.section_index import UserIndexCache, fetch_user_sections
+from app.utils.utils import pre_process_journal
+
+
+class BM25Index:
+    """
+    Okapi BM25 over a user's journal sections, tokenized with the same
+    pre_process_journal and STOPWORDS as the dashboard word counts. Postings
+    map each term to the sections containing it and their term frequency, so
+    a query only touches the sections sharing one of its terms.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids: List[str] = []
+        self.journal_ids: List[str] = []
+        self.texts: List[str] = []
+        self.lengths: List[int] = []
+        self.total_length = 0
+        self.postings = defaultdict(dict)
+        self.known = set()
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, journal_ids, texts):
+        with self.lock:
+            for section_id, journal_id, text in zip(ids, journal_ids, texts):
+                if section_id in self.known:
+                    continue
+                position = len(self.ids)
+                terms = pre_process_journal(text)
+                for term, frequency in Counter(terms).items():
+                    self.postings[term][position] = frequency
+                self.ids.append(section_id)
+                self.journal_ids.append(journal_id)
+                self.texts.append(text)
+                self.lengths.append(len(terms))
+                self.total_length += len(terms)
+                self.known.add(section_id)
+
+    def search(self, query: str, journal_ids: Iterable[str], k: int) -> List[dict]:
+        allowed = set(journal_ids)
+        with self.lock:
+            if not self.ids:
+                return []
+            average_length = max(self.total_length / len(self.ids), 1e-9)
+            scores = defaultdict(float)
+            for term in set(pre_process_journal(query)):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(
+                    1 + (len(self.ids) - len(postings) + 0.5) / (len(postings) + 0.5)
+                )
+                for position, frequency in postings.items():
+                    if self.journal_ids[position] not in allowed:
+                        continue
+                    norm = 1 - self.b + self.b * self.lengths[position] / average_length
+                    scores[position] += (
+                        idf * frequency * (self.k1 + 1) / (frequency + self.k1 * norm)
+                    )
+            best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+            return [
+                {
+                    "id": self.ids[position],
+                    "journal_id": self.journal_ids[position],
+                    "text": self.texts[position],
+                    "bm25": round(score, 4),
+                }
+                for position, score in best
+            ]
+
+
+def _build(user_id: str) -> BM25Index:
+    index = BM25Index()
+    rows = list(fetch_user_sections(user_id, "id, journal_id, text"))
+    index.add(
+        [row["id"] for row in rows],
+        [row["journal_id"] for row in rows],
+        [row["text"] for row in rows],
+    )
+    return index
+
+
+def _append(index: BM25Index, sections: List[JournalSection]) -> bool:
+    index.add(
+        [str(section.id) for section in sections],
+        [str(section.journal_id) for section in sections],
+        [section.text for section in sections],
+    )
+    return True
+
+
+lexical_indexes = UserIndexCache(
+    "lexical index", _build, _append, max_users=LOCAL_INDEX_MAX_USERS
+)
+
+
+def lexical_search(user_id: str, query: str, journal_ids: list, match_count: int):
+    """Best ``match_count`` sections by BM25 among the given journals."""
+    if not journal_ids:
+        return []
+    return lexical_indexes.get(user_id).search(query, journal_ids, match_count)
@@ -1,4 +1,9 @@
-from app.core.config import OTP_EXPIRY_MINS
+from app.core.config import (
+    CHAT_HISTORY_MAX_TURNS,
+    CHAT_HISTORY_WINDOW,
+    CHAT_SUMMARY_BATCH,
+    OTP_EXPIRY_MINS,
+)
 from app.core.connection import redis_client
 import logging
 import json
@@ -39,10 +44,55 @@ def verify_otp(email: str, entered_otp: str):
     return True
 
 
-def store_history(data: list, user_id: str):
+HISTORY_TTL_SECONDS = 30 * 24 * 60 * 60
+
+
+# A user's chat turns are a Redis list, appended with RPUSH and capped at
+# CHAT_HISTORY_MAX_TURNS. ChatTurns counts every turn ever stored, so a turn's
+# number stays stable while LTRIM drops the oldest ones. ChatSummary holds the
+# rolling summary and the number of the last turn folded into it.
+def _history_key(user_id: str) -> str:
+    return f"ChatHistory:{user_id}"
+
+
+def _turns_key(user_id: str) -> str:
+    return f"ChatTurns:{user_id}"
+
+
+def _summary_key(user_id: str) -> str:
+    return f"ChatSummary:{user_id}"
+
+
+def _migrate_legacy_history(user_id: str) -> list:
+    """Move history stored as one JSON blob under the bare user id to the list."""
+    data = redis_client.get(user_id)
+    if not data:
+        return []
+    turns = json.loads(data)[-CHAT_HISTORY_MAX_TURNS:]
+    pipe = redis_client.pipeline(transaction=True)
+    if turns:
+        pipe.rpush(_history_key(user_id), *[json.dumps(turn) for turn in turns])
+        pipe.set(_turns_key(user_id), len(turns))
+        pipe.expire(_history_key(user_id), HISTORY_TTL_SECONDS)
+        pipe.expire(_turns_key(user_id), HISTORY_TTL_SECONDS)
+    pipe.delete(user_id)
+    pipe.execute()
+    logging.info(f"✅ Migrated {len(turns)} history turns to a list for {user_id}")
+    return turns
+
+
+def append_history(user_id: str, turn: dict) -> int:
+    """Append one turn to the user's history, returns its turn number."""
     try:
-        redis_client.set(name=user_id, value=data, ex=30 * 24 * 60 * 60)
-        logging.info(f"✅ History stored successfully in Redis for {user_id}")
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.rpush(_history_key(user_id), json.dumps(turn))
+        pipe.ltrim(_history_key(user_id), -CHAT_HISTORY_MAX_TURNS, -1)
+        pipe.incr(_turns_key(user_id))
+        for key in (_history_key(user_id), _turns_key(user_id), _summary_key(user_id)):
+            pipe.expire(key, HISTORY_TTL_SECONDS)
+        number = pipe.execute()[2]
+        logging.info(f"✅ History turn {number} stored in Redis for {user_id}")
+        return number
     except Exception as e:
         error_msg = (
             f"❌ Failed to store history in Redis for user ID '{user_id}': {str(e)}"
@@ -55,19 +105,56 @@ def store_history(data: list, user_id: str):
         )
 
 
-def get_history(user_id: str):
+def get_history(user_id: str, last: int = 0):
+    """The user's stored turns, oldest first, only the ``last`` ones if given."""
     try:
-        data = redis_client.get(user_id)
-        if not data:
+        data = redis_client.lrange(_history_key(user_id), -last if last else 0, -1)
+        if data:
+            logging.info(
+                f"📦 History retrieved successfully from Redis for user ID '{user_id}'."
+            )
+            return [json.loads(turn) for turn in data]
+        turns = _migrate_legacy_history(user_id)
+        if not turns:
             logging.info(
                 f"📭 No history found in Redis for user ID '{user_id}'. Returning empty list."
             )
-            return []
-        logging.info(
-            f"📦 History retrieved successfully from Redis for user ID '{user_id}'."
+        return turns[-last:] if last else turns
+
+    except Exception as e:
+        error_msg = (
+            f"❌ Error retrieving history from Redis for user ID '{user_id}': {str(e)}"
+        )
+        logging.error(error_msg)
+        raise APIException(
+            500,
+            "An error occurred while retrieving the user's history.",
+            detail=error_msg,
         )
-        loaded_data: list = json.loads(data)
-        return loaded_data
+
+
+def get_chat_context(user_id: str):
+    """
+    The rolling summary and every turn after the last one folded into it,
+    read in one round trip. These are all that is replayed to the LLM. Turns
+    are only summarized in batches, so besides the last CHAT_HISTORY_WINDOW
+    turns up to CHAT_SUMMARY_BATCH older ones not summarized yet are included.
+    """
+    limit = CHAT_HISTORY_WINDOW + CHAT_SUMMARY_BATCH
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.lrange(_history_key(user_id), -limit, -1)
+        pipe.get(_turns_key(user_id))
+        pipe.get(_summary_key(user_id))
+        data, total, summary = pipe.execute()
+        state = json.loads(summary) if summary else {"summary": "", "through": 0}
+        turns = [json.loads(turn) for turn in data]
+        if not turns:
+            return _migrate_legacy_history(user_id)[-limit:], state["summary"]
+        # The fetched turns are numbers total - len(turns) + 1 to total.
+        first = int(total or len(turns)) - len(turns) + 1
+        unsummarized = max(state["through"] + 1 - first, 0)
+        return turns[unsummarized:], state["summary"]
 
     except Exception as e:
         error_msg = (
@@ -81,10 +168,58 @@ def get_history(user_id: str):
         )
 
 
+def get_turns_to_summarize(user_id: str):
+    """
+    (summary, turns, last turn number) when at least CHAT_SUMMARY_BATCH turns
+    have left the window since the last summary, otherwise None.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.llen(_history_key(user_id))
+    pipe.get(_turns_key(user_id))
+    pipe.get(_summary_key(user_id))
+    length, total, summary = pipe.execute()
+    total = int(total or 0)
+    state = json.loads(summary) if summary else {"summary": "", "through": 0}
+    fold_through = total - CHAT_HISTORY_WINDOW
+    if fold_through - state["through"] < CHAT_SUMMARY_BATCH:
+        return None
+    # The list holds turns total - length + 1 to total.
+    offset = total - length + 1
+    data = redis_client.lrange(
+        _history_key(user_id),
+        max(state["through"] + 1 - offset, 0),
+        fold_through - offset,
+    )
+    return state["summary"], [json.loads(turn) for turn in data], fold_through
+
+
+def store_history_summary(user_id: str, summary: str, through: int):
+    redis_client.set(
+        _summary_key(user_id),
+        json.dumps({"summary": summary, "through": through}),
+        ex=HISTORY_TTL_SECONDS,
+    )
+    logging.info(f"✅ History summary through turn {through} stored for {user_id}")
+
+
+def claim_history_summary(user_id: str) -> bool:
+    """Only one worker at a time folds a user's turns into the summary."""
+    return bool(redis_client.set(f"{_summary_key(user_id)}:lock", 1, nx=True, ex=120))
+
+
+def release_history_summary(user_id: str):
+    redis_client.delete(f"{_summary_key(user_id)}:lock")
+
+
 def delete_data(user_id: str):
     try:
-        result = redis_client.delete(user_id)
-        if result == 1:
+        result = redis_client.delete(
+            _history_key(user_id),
+            _turns_key(user_id),
+            _summary_key(user_id),
+            user_id,
+        )
+        if result:
             logging.info(f"🗑️ History deleted successfully for user ID '{user_id}'.")
         else:
             logging.info(f"📭 No history found to delete for user ID '{user_id}'.")
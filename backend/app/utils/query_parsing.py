@@ -0,0 +1,367 @@
+from calendar import monthrange
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+import re
+from typing import Optional, Tuple
+
+GO_EMOTION_LABELS = [
+    "admiration",
+    "amusement",
+    "annoyance",
+    "approval",
+    "caring",
+    "confusion",
+    "curiosity",
+    "desire",
+    "disappointment",
+    "disapproval",
+    "disgust",
+    "embarrassment",
+    "excitement",
+    "fear",
+    "gratitude",
+    "grief",
+    "joy",
+    "love",
+    "nervousness",
+    "optimism",
+    "pride",
+    "realization",
+    "relief",
+    "remorse",
+    "sadness",
+    "surprise",
+    "neutral",
+]
+
+# Everyday words for each label, besides the label itself.
+MOOD_WORDS = {
+    "admiration": ["admire", "admired", "impressed"],
+    "amusement": ["amused", "funny", "laughed", "laughing"],
+    "annoyance": ["annoyed", "irritated", "angry", "anger", "frustrated", "mad"],
+    "approval": ["approved", "agreed"],
+    "caring": ["cared"],
+    "confusion": ["confused"],
+    "curiosity": ["curious"],
+    "desire": ["wanted", "longing", "craving"],
+    "disappointment": ["disappointed", "let down"],
+    "disapproval": ["disapproved"],
+    "disgust": ["disgusted", "gross"],
+    "embarrassment": ["embarrassed", "ashamed"],
+    "excitement": ["excited", "thrilled", "exciting"],
+    "fear": ["afraid", "scared", "frightened", "terrified"],
+    "gratitude": ["grateful", "thankful"],
+    "grief": ["grieving", "mourning"],
+    "joy": ["happy", "happiness", "joyful", "glad", "cheerful"],
+    "love": ["loved", "loving"],
+    "nervousness": ["nervous", "anxious", "anxiety", "worried", "stressed", "stress"],
+    "optimism": ["optimistic", "hopeful"],
+    "pride": ["proud"],
+    "realization": ["realized", "realised"],
+    "relief": ["relieved"],
+    "remorse": ["regret", "regretted", "guilty"],
+    "sadness": ["sad", "upset", "unhappy", "depressed", "lonely", "cried"],
+    "surprise": ["surprised", "shocked"],
+    "neutral": [],
+}
+MOOD_LOOKUP = {
+    word: label
+    for label, words in MOOD_WORDS.items()
+    for word in [label, *words]
+    if label != "neutral"
+}
+MOOD_PATTERN = re.compile(
+    r"\b("
+    + "|".join(sorted(map(re.escape, MOOD_LOOKUP), key=len, reverse=True))
+    + r")\b"
+)
+NEGATION = re.compile(r"\b(not|no|never|without|nor)\b|n't\b")
+
+MONTHS = [
+    "january",
+    "february",
+    "march",
+    "april",
+    "may",
+    "june",
+    "july",
+    "august",
+    "september",
+    "october",
+    "november",
+    "december",
+]
+MONTH_PATTERN = re.compile(
+    r"\b(?:in|during|for|of)\s+(" + "|".join(MONTHS) + r")(?:\s+(\d{4}))?\b"
+)
+YEAR_PATTERN = re.compile(r"\b(?:in|during)\s+(\d{4})\b")
+PERIOD_PATTERN = re.compile(
+    r"\b(this|last|past|previous)\s+(?:(\d+|few|couple of)\s+)?"
+    r"(day|week|month|year)s?\b"
+)
+MONTH_REFERENCE = r"(this month|last month|" + "|".join(MONTHS) + r")(?:\s+(\d{4}))?"
+# "the 2nd of this month", "5th of march 2025".
+DAY_OF_PATTERN = re.compile(
+    r"\b(?:the\s+)?(\d{1,2})(?:st|nd|rd|th)?\s+of\s+" + MONTH_REFERENCE + r"\b"
+)
+# "the first week of september", "last week of this month".
+WEEK_OF_PATTERN = re.compile(
+    r"\b(first|second|third|fourth|last)\s+week\s+(?:of|in)\s+"
+    + MONTH_REFERENCE
+    + r"\b"
+)
+DAY_BEFORE_YESTERDAY = re.compile(r"\b(?:the\s+)?day before yesterday\b")
+SINCE_PATTERN = re.compile(r"\b(since|after)\b")
+# "may" is left out, as a verb it is far more common than the month.
+DAY_WORDS = (
+    r"\b(today|yesterday|ago|"
+    + "|".join(month for month in MONTHS if month != "may")
+    + r"|monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b"
+)
+DATE_WORDS = re.compile(r"\d|" + DAY_WORDS)
+# What a phrase found by dateparser needs to be trusted as a date. A bare
+# number like "the 5th" or "8" is not, it is read as a month or the hour.
+DATE_PHRASE = re.compile(r"\d{1,4}[-/.]\d{1,2}|" + DAY_WORDS)
+# Durations and times of day, which dateparser reads as today or yesterday.
+TIME_PATTERN = re.compile(
+    r"\d\s*(a\.?m|p\.?m)\b|\d:\d{2}|\b(hours?|hrs?|minutes?|mins?|"
+    r"seconds?|secs?|o'clock|noon|midnight)\b"
+)
+# Any reference to a time, including the ones the rules above cannot resolve,
+# e.g. "last night", "this weekend", "on christmas" or "two weeks back".
+# A query with one of these left over is given to the LLM.
+TIME_CUES = re.compile(
+    r"\d|"
+    + DAY_WORDS
+    + r"|\b(last|past|previous|next|before|until|till|back|recent|recently|"
+    r"lately|tonight|tomorrow|weekends?|fortnight|summer|winter|spring|autumn|"
+    r"seasons?|holidays?|vacation|christmas|diwali|easter|new year|birthday)\b|"
+    r"\b(a|an|one|two|three|four|five|six|seven|eight|nine|ten|few|couple of)"
+    r"\s+(days?|weeks?|months?|years?)\b"
+)
+
+HISTORY_PATTERN = re.compile(
+    r"\b(earlier|previous (answer|response|message|question)s?|"
+    r"(last|your) (answer|response|reply)|you (said|told|mentioned|answered)|"
+    r"what did i (just )?ask|i asked( you)?|our (chat|conversation)|"
+    r"this conversation|repeat that)\b"
+)
+JOURNAL_PATTERN = re.compile(
+    r"\b(i|i'm|i've|i'd|me|my|myself|mine|journal|journals|entry|entries|"
+    r"diary|wrote|write|written)\b"
+)
+# Requests the LLM decides on, usually not about the journals at all.
+UNRELATED_PATTERN = re.compile(
+    r"[=+*/^]\s*\d|\b(solve|equation|calculate|code|program|function|"
+    r"algorithm|translate|joke|weather|recipe|capital of|who is|what is a)\b"
+)
+
+
+def normalize_query(user_query: str) -> str:
+    """Lower cased, single spaced and without surrounding punctuation."""
+    return re.sub(r"\s+", " ", user_query).strip().strip("?!.,;: ").lower()
+
+
+@lru_cache(maxsize=None)
+def _search_dates():
+    # dateparser loads its language data on import, so it is only imported on
+    # the first query with a date in it, see benchmarks/startup.py.
+    from dateparser.search import search_dates
+
+    return search_dates
+
+
+def _period_range(match: re.Match, today: date) -> Tuple[date, date]:
+    which, count, unit = match.groups()
+    count = {None: 1, "few": 3, "couple of": 2}.get(count) or int(count)
+    if which == "this":
+        if unit == "day":
+            return today, today
+        if unit == "week":
+            return today - timedelta(days=today.weekday()), today
+        if unit == "month":
+            return today.replace(day=1), today
+        return today.replace(month=1, day=1), today
+    if which == "last" and match.group(2) is None:
+        # "last week" is the calendar week before this one, and so on.
+        if unit == "day":
+            return today - timedelta(days=1), today - timedelta(days=1)
+        if unit == "week":
+            start = today - timedelta(days=today.weekday() + 7)
+            return start, start + timedelta(days=6)
+        if unit == "month":
+            end = today.replace(day=1) - timedelta(days=1)
+            return end.replace(day=1), end
+        return date(today.year - 1, 1, 1), date(today.year - 1, 12, 31)
+    # "past 3 days", "last 2 weeks": a rolling window ending today.
+    days = {"day": 1, "week": 7, "month": 30, "year": 365}[unit] * count
+    return today - timedelta(days=days), today
+
+
+def _month_of(reference: str, year: Optional[str], today: date) -> Tuple[int, int]:
+    """(year, month) of "this month", "last month" or a month name."""
+    if reference == "this month":
+        return today.year, today.month
+    if reference == "last month":
+        previous = today.replace(day=1) - timedelta(days=1)
+        return previous.year, previous.month
+    month = MONTHS.index(reference) + 1
+    if year:
+        return int(year), month
+    # A month without a year is the last one that has begun.
+    return (today.year - 1 if month > today.month else today.year), month
+
+
+def _month_range(match: re.Match, today: date) -> Tuple[date, date]:
+    year, month = _month_of(match.group(1), match.group(2), today)
+    return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+
+
+def _day_of_range(match: re.Match, today: date) -> Optional[Tuple[date, date]]:
+    year, month = _month_of(match.group(2), match.group(3), today)
+    day = int(match.group(1))
+    if not 1 <= day <= monthrange(year, month)[1]:
+        return None
+    return date(year, month, day), date(year, month, day)
+
+
+def _week_of_range(match: re.Match, today: date) -> Tuple[date, date]:
+    year, month = _month_of(match.group(2), match.group(3), today)
+    last_day = monthrange(year, month)[1]
+    if match.group(1) == "last":
+        return date(year, month, last_day - 6), date(year, month, last_day)
+    first = 1 + 7 * ["first", "second", "third", "fourth"].index(match.group(1))
+    return date(year, month, first), date(year, month, min(first + 6, last_day))
+
+
+def _year_range(match: re.Match, today: date) -> Tuple[date, date]:
+    year = int(match.group(1))
+    return date(year, 1, 1), date(year, 12, 31)
+
+
+def _day_before_yesterday(match: re.Match, today: date) -> Tuple[date, date]:
+    return today - timedelta(days=2), today - timedelta(days=2)
+
+
+# Tried in order, the most specific first, so "the first week of september" is
+# not read as all of september or "the 2nd of this month" as this month.
+DATE_RULES = [
+    (DAY_BEFORE_YESTERDAY, _day_before_yesterday),
+    (DAY_OF_PATTERN, _day_of_range),
+    (WEEK_OF_PATTERN, _week_of_range),
+    (PERIOD_PATTERN, _period_range),
+    (MONTH_PATTERN, _month_range),
+    (YEAR_PATTERN, _year_range),
+]
+
+
+def _date_range(query: str, today: date) -> Optional[Tuple[Optional[date], ...]]:
+    """
+    (start, end) of the time the query refers to, (None, None) without one, or
+    None when a date-like phrase could not be read with confidence. A phrase is
+    only resolved when no other reference to a time is left in the query, e.g.
+    "last week before my exams" goes to the LLM.
+    """
+    for pattern, resolve in DATE_RULES:
+        match = pattern.search(query)
+        if not match:
+            continue
+        rest = query[: match.start()] + " " + query[match.end() :]
+        if TIME_CUES.search(rest):
+            return None
+        found = resolve(match, today)
+        if found and SINCE_PATTERN.search(rest):
+            return found[0], today
+        return found
+    if not DATE_WORDS.search(query):
+        return None if TIME_CUES.search(query) else (None, None)
+    if TIME_PATTERN.search(query):
+        return None
+
+    found = _search_dates()(
+        query,
+        languages=["en"],
+        settings={
+            "PREFER_DATES_FROM": "past",
+            "RELATIVE_BASE": datetime.combine(today, datetime.min.time()),
+        },
+    )
+    # search_dates also reads words like "may" or "second" and bare numbers
+    # as dates, so only phrases with a numeric date, weekday, month or
+    # relative day word are trusted.
+    days = [day.date() for text, day in found or [] if DATE_PHRASE.search(text)]
+    if not days or len(days) != len(found or []) or len(days) > 2:
+        return None
+    rest = query
+    for text, _ in found:
+        rest = rest.replace(text, " ")
+    if TIME_CUES.search(rest):
+        return None
+    if SINCE_PATTERN.search(query):
+        return min(days), today
+    return min(days), max(days)
+
+
+def _moods(query: str) -> Optional[list]:
+    """Labels of the mood words in the query, None when one of them is negated."""
+    moods = []
+    for match in MOOD_PATTERN.finditer(query):
+        before = query[: match.start()].split()[-3:]
+        if NEGATION.search(" ".join(before)):
+            return None
+        label = MOOD_LOOKUP[match.group(1)]
+        if label not in moods:
+            moods.append(label)
+    return moods
+
+
+def rule_intent(query: str) -> Optional[str]:
+    """Intent of a normalized query by keyword rules, None when inconclusive."""
+    if HISTORY_PATTERN.search(query):
+        return "history"
+    if UNRELATED_PATTERN.search(query) or not JOURNAL_PATTERN.search(query):
+        return None
+    return "journal"
+
+
+def parse_query_locally(
+    query: str, today: date, intent: Optional[str] = None
+) -> Optional[dict]:
+    """
+    Parse a normalized chat query without the LLM: relative and absolute dates
+    with dateparser, moods by keyword against GO_EMOTION_LABELS. ``intent`` is
+    "journal", "history" or "unrelated" as decided by the intent classifier,
+    without one the keyword rules decide. Returns None when the query needs
+    the LLM, i.e. its intent is unclear or it has a negated mood or a date
+    phrase that could not be read. Tags and a title are left empty, hybrid
+    retrieval already searches the whole query.
+    """
+    intent = intent or rule_intent(query)
+    if intent is None:
+        return None
+    if intent != "journal":
+        return {
+            "date_range": {"start": None, "end": None},
+            "moods": [],
+            "tags": [],
+            "title": "",
+            "is_history": intent == "history",
+            "is_related": intent == "history",
+        }
+
+    moods = _moods(query)
+    date_range = _date_range(query, today)
+    if moods is None or date_range is None:
+        return None
+    start, end = date_range
+    return {
+        "date_range": {
+            "start": start.isoformat() if start else None,
+            "end": end.isoformat() if end else None,
+        },
+        "moods": moods,
+        "tags": [],
+        "title": "",
+        "is_history": False,
+        "is_related": True,
+    }
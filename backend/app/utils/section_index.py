@@ -0,0 +1,110 @@
+from collections import OrderedDict
+import threading
+from typing import Callable, Iterator, List
+from loguru import logger
+
+from app.core.connection import db, redis_client
+from app.db.schemas.journal import JournalSection
+
+SECTION_PAGE_SIZE = 1000
+
+# Every UserIndexCache of this process, so stored sections reach all of them.
+_caches: List["UserIndexCache"] = []
+
+
+def _version_key(user_id: str) -> str:
+    return f"SectionIndex:{user_id}"
+
+
+def fetch_user_sections(user_id: str, columns: str) -> Iterator[dict]:
+    """All journal_sections rows of a user, read in pages of SECTION_PAGE_SIZE."""
+    offset = 0
+    while True:
+        rows = (
+            db.table("journal_sections")
+            .select(f"{columns}, journals!inner(user_id)")
+            .eq("journals.user_id", user_id)
+            .order("id")
+            .range(offset, offset + SECTION_PAGE_SIZE - 1)
+            .execute()
+            .data
+        )
+        yield from rows
+        if len(rows) < SECTION_PAGE_SIZE:
+            return
+        offset += SECTION_PAGE_SIZE
+
+
+class UserIndexCache:
+    """
+    Per user in-process indexes over journal_sections, built on first use and
+    kept in an LRU of ``max_users`` users. A version counter per user in Redis
+    is bumped on every change to the user's sections, so an index built by
+    another worker process is rebuilt once it falls behind, while the worker
+    that stored new sections appends them to its indexes in place.
+
+    ``build(user_id)`` returns a new index and ``append(index, sections)``
+    adds sections to one, returning False when it cannot and the index has to
+    be rebuilt instead.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        build: Callable,
+        append: Callable[[object, List[JournalSection]], bool],
+        max_users: int,
+    ):
+        self.name = name
+        self.build = build
+        self.append = append
+        self.max_users = max_users
+        self.entries: OrderedDict = OrderedDict()
+        self.lock = threading.Lock()
+        _caches.append(self)
+
+    def get(self, user_id: str):
+        version = int(redis_client.get(_version_key(user_id)) or 0)
+        with self.lock:
+            entry = self.entries.get(user_id)
+            if entry is not None:
+                self.entries.move_to_end(user_id)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+
+        index = self.build(user_id)
+        logger.info(f"✅ Built {self.name} for user {user_id}: {len(index)} sections")
+        with self.lock:
+            self.entries[user_id] = (version, index)
+            self.entries.move_to_end(user_id)
+            while len(self.entries) > self.max_users:
+                self.entries.popitem(last=False)
+        return index
+
+    def _added(self, user_id: str, version: int, sections: List[JournalSection]):
+        with self.lock:
+            entry = self.entries.pop(user_id, None)
+        # Another worker changed the sections meanwhile, rebuild on next use.
+        if entry is None or entry[0] != version - 1:
+            return
+        if self.append(entry[1], sections):
+            with self.lock:
+                self.entries.setdefault(user_id, (version, entry[1]))
+
+    def _drop(self, user_id: str):
+        with self.lock:
+            self.entries.pop(user_id, None)
+
+
+def sections_added(user_id: str, sections: List[JournalSection]):
+    """Call after new sections of a user were stored."""
+    version = redis_client.incr(_version_key(user_id))
+    for cache in _caches:
+        cache._added(user_id, version, sections)
+
+
+def sections_changed(user_id: str):
+    """Call after sections of a user were changed or removed."""
+    redis_client.incr(_version_key(user_id))
+    for cache in _caches:
+        cache._drop(user_id)
@@ -1,39 +1,74 @@
 from datetime import date, datetime, timedelta, timezone
 import json
 from typing import Awaitable, Dict, List, Optional
-from uuid import UUID, uuid4
+from uuid import UUID
 from fastapi import HTTPException, status
 from fastapi.encoders import jsonable_encoder
 from pydantic import EmailStr
-from torch import embedding
 from app.core.connection import db
-from app.core.config import MODEL_VECTOR
-from transformers import pipeline
+from app.core.config import (
+    INFERENCE_BACKEND,
+    INFERENCE_CACHE_SIZE,
+    INFERENCE_CACHE_TTL_SECONDS,
+    INFERENCE_URL,
+    MODEL_VECTOR,
+)
 from app.core.connection import redis_client
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_text_splitters import RecursiveCharacterTextSplitter
+from app.inference.cache import (
+    InferenceCache,
+    cached_batch,
+    decode_vector,
+    encode_vector,
+)
+from app.inference.client import remote_classifier, remote_embeddings
+from app.inference.models import embedding_model as local_embedding_model
+from app.inference.models import mood_classifier as local_mood_classifier
+from app.inference.models import EMOTION_MODEL
 from loguru import logger
 from collections import Counter
 import string
+import numpy as np
 
+from app.db.schemas.journal import Journal, JournalSection
+from app.utils.chunking import chunk_text
+
+
+# With INFERENCE_URL set the models live in the shared inference service and
+# this process only holds a thin client; otherwise they are loaded in-process
+# the first time they are needed.
+def embedding_model():
+    if INFERENCE_URL:
+        return remote_embeddings(INFERENCE_URL)
+    return local_embedding_model()
 
-from app.core.exceptions import APIException
-from app.db.schemas.journal import (
-    DraftCreate,
-    Journal,
-    JournalSection,
-)
 
-embedding_model = HuggingFaceEmbeddings(model_name=MODEL_VECTOR)
-text_splitter = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=20)
+def mood_classifier():
+    if INFERENCE_URL:
+        return remote_classifier(INFERENCE_URL)
+    return local_mood_classifier()
 
 
-mood_classifier = pipeline(
-    "text-classification",
-    model="SamLowe/roberta-base-go_emotions",
-    top_k=None,
-    truncation=True,
+# Titles, repeated chunks, chat queries and re-submitted drafts hit the same
+# strings again and again. INFERENCE_CACHE_TTL_SECONDS > 0 adds a Redis tier
+# shared by all workers on top of the per-process LRU.
+embedding_cache = InferenceCache(
+    f"{MODEL_VECTOR}:{INFERENCE_BACKEND}",
+    INFERENCE_CACHE_SIZE,
+    encode=encode_vector,
+    decode=decode_vector,
+    redis=redis_client,
+    ttl_seconds=INFERENCE_CACHE_TTL_SECONDS,
 )
+mood_cache = InferenceCache(
+    f"{EMOTION_MODEL}:{INFERENCE_BACKEND}",
+    INFERENCE_CACHE_SIZE,
+    redis=redis_client,
+    ttl_seconds=INFERENCE_CACHE_TTL_SECONDS,
+)
+
+
+def inference_cache_stats() -> dict:
+    return {"embedding": embedding_cache.stats(), "mood": mood_cache.stats()}
 
 
 def get_user_by_email(email: EmailStr):
@@ -47,211 +82,148 @@ def get_user_by_email(email: EmailStr):
         )
 
 
+def embed_texts(texts: List[str]) -> np.ndarray:
+    """
+    Embed every text, running the texts missing from the cache in one batched
+    forward pass. Returns a float32 matrix with one row per text, in input order.
+    """
+    if not texts:
+        return np.empty((0, 0), dtype=np.float32)
+    vectors = cached_batch(
+        embedding_cache,
+        texts,
+        # Rows are copied so a cached vector does not pin its whole batch.
+        lambda missing: [
+            vector.copy()
+            for vector in np.asarray(
+                embedding_model().embed_documents(missing), dtype=np.float32
+            )
+        ],
+    )
+    return np.stack(vectors)
+
+
+def pool_embeddings(vectors: np.ndarray) -> np.ndarray:
+    return vectors.mean(axis=0, dtype=np.float32)
+
+
 def generate_embedding(text: str) -> list:
-    chunks = text_splitter.split_text(text)
+    chunks = chunk_text(text)
     if not chunks:
         chunks = [text]
-    embeddings = embedding_model.embed_documents(chunks)  # List of 384-dim vectors
-    avg_embedding = [
-        sum(col) / len(col) for col in zip(*embeddings)
-    ]  # Average to 384 dimensions
-    # print (f"avg embeddings are {avg_embedding}")
-    return avg_embedding
+    return pool_embeddings(embed_texts(chunks)).tolist()
 
 
 def direct_embedding(text: str) -> list:
-    chunks = [text]
-    embeddings = embedding_model.embed_documents(chunks)
-    # print (f"embeddings are {embeddings}")
-    return embeddings
-
+    return embed_texts([text]).tolist()
 
-def analyze_mood(text: str) -> dict:
-    results = mood_classifier(text)
-    # print(f"results are {results}")
-
-    if results and isinstance(results, list) and len(results) > 0:
-        mood_list = results[0]
-    else:
-        mood_list = []  # Fallback to empty list if results is empty or malformed
-    moods = {
-        result["label"]: result["score"] for result in mood_list
-    }  # Convert to dict
 
+def _top_moods(mood_list: List[dict]) -> dict:
     moods = {result["label"]: round(result["score"], 4) for result in mood_list}
-
-    print(f"Moods : {moods}")
-
     sorted_moods = sorted(moods.items(), key=lambda x: x[1], reverse=True)
 
-    print(sorted_moods)
-
     top_three_moods = sorted_moods[:3]
 
     dominant_mood = sorted_moods[0][0] if sorted_moods else "neutral"
     top_moods = {label: score for label, score in top_three_moods}
-    # print(top_moods)
     return {"dominant": dominant_mood, **top_moods}
 
 
-def submit_draft(user_id: str, journal_date: Optional[str] = None):
-    print(f"User ID: {user_id}")
-    today = datetime.now(timezone.utc).date()
-    today_key = date.today().isoformat()
-    if journal_date:
-        today_key = journal_date
-    print(f"Draft:{user_id}:{today_key}")
-    draft_data = redis_client.get(f"Draft:{user_id}:{today_key}")
-    print(draft_data)
-    if draft_data:
-        try:
-            journal_id = str(uuid4())
-            draft_dict = json.loads(draft_data)
-            draft = DraftCreate(**draft_dict)
-            logger.info(f"Draft Data: {draft}, User ID: {user_id}")
-            chunks = text_splitter.split_text(draft.content)
-            combine_embeddings = generate_embedding(draft.content)
-            moods = analyze_mood(draft.content)
-            section_number = 0
-
-            journal = aggregate_journal(
-                chunks,
-                user_id,
-                str(today),
-                combine_embeddings,
-                draft.tags,
-                journal_id,
-                title=draft.title,
-                title_embedding=direct_embedding(draft.title),
-                rich_text=draft.rich_text,
-            )
-            data_json = jsonable_encoder(journal)
-            print(f"journal data is {data_json}")
-            insert_journal(data_json, db)
-
-            for chunk in chunks:
-                section = process_draft_chunk(
-                    journal_id, chunk, section_number, user_id, today
-                )
-                section_data = section
-                section_number += 1
-                id = insert_journal_section(section_data, db)
-                logger.info(f"✅ Processed draft for {today} and stored in Supabase")
-            redis_client.delete(f"Draft:{user_id}:{today_key}")
-            return user_id
-
-        except ValueError as ve:
-            logger.error(f"Error processing draft: {str(ve)}")
-            raise APIException(
-                status_code=400, detail=str(ve), message="Value Error Is Coming"
-            )
-        except Exception as e:
-            logger.error(f"Error processing draft: {str(e)}")
-            raise APIException(
-                status_code=400, detail=str(e), message="Exception Is Coming"
-            )
-    raise APIException(
-        status_code=400,
-        detail="No valid draft data found",
-        message="No Drafts Processed",
-    )
+def classify_texts(texts: List[str], batch_size: int = 32) -> List[dict]:
+    """
+    Classify every text missing from the cache with a single batched pipeline
+    call and return the dominant mood plus the top three mood scores for each
+    one, in input order.
+    """
+    if not texts:
+        return []
+
+    def classify(missing: List[str]) -> List[dict]:
+        results = mood_classifier()(missing, batch_size=min(batch_size, len(missing)))
+        return [_top_moods(mood_list or []) for mood_list in results]
 
+    # Cached dicts are shared, callers get their own copies to modify.
+    return [dict(moods) for moods in cached_batch(mood_cache, texts, classify)]
 
-def insert_journal(journal_data, db):
+
+def analyze_mood(text: str) -> dict:
+    return classify_texts([text])[0]
+
+
+def insert_journal_with_sections(journal: Journal, sections: List[JournalSection], db):
+    """
+    Write a journal and all of its sections in one RPC. The database function
+    runs in a single transaction, so either every row is stored or none is, and
+    rows whose id already exists are skipped so a retried submit is a no-op.
+    """
     try:
-        response = db.table("journals").insert(journal_data).execute()
+        response = db.rpc(
+            "insert_journal_with_sections",
+            {
+                "journal": jsonable_encoder(journal),
+                "sections": jsonable_encoder(sections),
+            },
+        ).execute()
         if not response.data:
             raise ValueError("Failed to insert journal")
-        return response.data[0]["id"]
+        return response.data
     except Exception as e:
         logger.error(f"❌ Error inserting journal: {str(e)}")
         raise ValueError(f"Insertion failed: {str(e)}")
 
 
-def insert_journal_section(section_data: dict, db):
+def insert_journals_with_sections(
+    journals: List[Journal], sections: List[JournalSection], db
+) -> int:
+    """
+    Write a batch of journals and their sections in one transactional RPC.
+    Journals whose id already exists, or whose user already has a journal on
+    that date, are skipped along with their sections.
+    Returns the number of journals inserted.
+    """
     try:
-        response = (
-            db.table("journal_sections")
-            .insert(jsonable_encoder(section_data))
-            .execute()
-        )
-        if not response.data:
-            raise ValueError("Failed to insert journal section")
-        return response.data[0]["id"]
+        response = db.rpc(
+            "insert_journals_with_sections",
+            {
+                "journal_rows": jsonable_encoder(journals),
+                "section_rows": jsonable_encoder(sections),
+            },
+        ).execute()
+        return response.data or 0
     except Exception as e:
-        logger.error(f"❌ Error inserting journal section: {str(e)}")
-        raise ValueError(f"Insertion failed: {str(e)}")
+        logger.error(f"❌ Error inserting journals: {str(e)}")
+        raise ValueError(f"Bulk insertion failed: {str(e)}")
 
 
-def process_draft_chunk(
-    journal_id: str, chunk: str, section_number: int, user_id: str, date: str
+def update_journal_with_sections(
+    journal: dict, sections: List[JournalSection], keep_section_ids: List[str], db
 ):
-    section_id = str(uuid4())
-    chunk_moods = analyze_mood(chunk)
-    dominant_mood = chunk_moods["dominant"]
-    embedding = direct_embedding(chunk)
-
-    section_data = {
-        "id": section_id,
-        "journal_id": journal_id,  # Will be set after journal creation
-        "section_number": section_number,
-        "text": chunk,
-        "moods": chunk_moods,  # JSONB with all mood scores
-        "embedding": embedding[0],  # 384-dimensional vector
-        "created_at": date.today().isoformat(),  # date type
-    }
-    return JournalSection(**section_data)
-
-
-def aggregate_journal(
-    chunks: List[str],
-    user_id: str,
-    date: str,
-    combine_embedding,
-    tags,
-    journal_id: str,
-    title: str,
-    title_embedding: list[float],
-    rich_text: str,
-):
-    aggregated_content = " ".join(chunks)
-    moods = {}  # Dictionary to store aggregated mood scores
-
-    for chunk in chunks:
-        chunk_moods = analyze_mood(chunk)
-        for mood, score in chunk_moods.items():
-            if mood != "dominant":
-                moods[mood] = moods.get(mood, 0) + score
-
-    if moods and chunks:
-        num_chunks = len(chunks)
-        moods = {mood: round(score / num_chunks, 4) for mood, score in moods.items()}
-
-    if moods:
-        sorted_moods = sorted(moods.items(), key=lambda x: x[1], reverse=True)[:3]
-        print(f"Moods is  {sorted_moods}")
-        moods = dict(sorted_moods)
-    else:
-        moods = {"neutral": 0.0}
-
-    journal_moods = moods
-
-    journal_data = {
-        "id": journal_id,
-        "user_id": user_id,
-        "content": aggregated_content,
-        "moods": journal_moods,
-        "tags": {},  # Optional, can expand later
-        "embedding": combine_embedding,
-        "tags": tags,
-        "embedding": combine_embedding,
-        "created_at": datetime.now(timezone.utc),
-        "title": title,
-        "title_embedding": title_embedding[0],
-        "rich_text": rich_text,
-    }
-    # return JournalCreate(**journal_data)
-    return Journal(**journal_data)
+    """
+    Update a journal, upsert the given sections and delete every other section
+    of the journal not in ``keep_section_ids``, all in one transactional RPC.
+    """
+    try:
+        response = db.rpc(
+            "update_journal_with_sections",
+            {
+                "journal": jsonable_encoder(journal),
+                "sections": jsonable_encoder(sections),
+                "keep_section_ids": keep_section_ids,
+            },
+        ).execute()
+        if not response.data:
+            raise ValueError("Failed to update journal")
+        return response.data
+    except Exception as e:
+        logger.error(f"❌ Error updating journal: {str(e)}")
+        raise ValueError(f"Update failed: {str(e)}")
+
+
+def parse_vector(value) -> np.ndarray:
+    """pgvector columns come back from PostgREST as '[0.1,0.2,...]' strings."""
+    if isinstance(value, str):
+        value = json.loads(value)
+    return np.asarray(value, dtype=np.float32)
 
 
 STOPWORDS = set(
@@ -0,0 +1,227 @@
+from abc import ABC, abstractmethod
+from functools import lru_cache
+import threading
+from typing import Iterable, List
+import numpy as np
+from loguru import logger
+
+from app.core.config import HNSW_MIN_SECTIONS, LOCAL_INDEX_MAX_USERS, VECTOR_STORE
+from app.core.connection import db
+from app.core.exceptions import APIException
+from app.db.schemas.journal import JournalSection
+from app.utils.section_index import UserIndexCache, fetch_user_sections
+from app.utils.utils import parse_vector
+
+VECTOR_STORES = ("supabase", "local")
+# Graph degree and search breadth for HNSW, see benchmarks/vector_store.py.
+HNSW_M = 16
+HNSW_EF_SEARCH = 128
+
+
+class VectorStore(ABC):
+    """
+    Semantic search over a user's journal sections. Every match is a dict with
+    at least the section ``id``, ``journal_id``, ``text`` and ``similarity``.
+    """
+
+    @abstractmethod
+    def search(
+        self,
+        user_id: str,
+        query_embedding: np.ndarray,
+        journal_ids: List[str],
+        match_count: int,
+    ) -> List[dict]:
+        """Best ``match_count`` sections among the given journals, best first."""
+
+
+class SupabaseVectorStore(VectorStore):
+    """pgvector search through the match_journal_sections RPC."""
+
+    def search(self, user_id, query_embedding, journal_ids, match_count):
+        if not journal_ids:
+            return []
+        response = db.rpc(
+            "match_journal_sections",
+            {
+                "query_embedding": np.asarray(query_embedding).tolist(),
+                "journal_ids": journal_ids,
+                "match_count": match_count,
+            },
+        ).execute()
+        return response.data
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+
+class UserIndex:
+    """
+    The sections of one user as a normalized float32 matrix, searched exactly
+    with one matrix product. From HNSW_MIN_SECTIONS sections on, an hnswlib
+    graph is built on top of the matrix for approximate search.
+    """
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.ids: List[str] = []
+        self.journal_ids = np.empty(0, dtype=object)
+        self.texts: List[str] = []
+        self.vectors = np.empty((0, dimension), dtype=np.float32)
+        self.hnsw = None
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def add(self, ids, journal_ids, texts, vectors: np.ndarray):
+        with self.lock:
+            known = set(self.ids)
+            keep = [i for i, section_id in enumerate(ids) if section_id not in known]
+            if not keep:
+                return
+            start = len(self.ids)
+            vectors = _normalize(np.asarray(vectors, dtype=np.float32)[keep])
+            self.ids.extend(ids[i] for i in keep)
+            self.texts.extend(texts[i] for i in keep)
+            self.journal_ids = np.concatenate(
+                [
+                    self.journal_ids,
+                    np.asarray([journal_ids[i] for i in keep], dtype=object),
+                ]
+            )
+            self.vectors = np.concatenate([self.vectors, vectors])
+            if self.hnsw is not None:
+                if len(self.ids) > self.hnsw.get_max_elements():
+                    self.hnsw.resize_index(2 * len(self.ids))
+                self.hnsw.add_items(vectors, np.arange(start, len(self.ids)))
+            elif len(self.ids) >= HNSW_MIN_SECTIONS:
+                self.hnsw = _build_hnsw(self.vectors)
+
+    def _exact(self, query: np.ndarray, allowed: np.ndarray, k: int):
+        scores = self.vectors[allowed] @ query
+        best = np.argpartition(-scores, k - 1)[:k]
+        best = best[np.argsort(-scores[best])]
+        return allowed[best], scores[best]
+
+    def _approximate(self, query: np.ndarray, allowed: np.ndarray, k: int):
+        mask = np.zeros(len(self.ids), dtype=bool)
+        mask[allowed] = True
+        self.hnsw.set_ef(max(HNSW_EF_SEARCH, 2 * k))
+        labels, distances = self.hnsw.knn_query(
+            query, k=k, filter=lambda label: mask[label]
+        )
+        return labels[0], 1 - distances[0]
+
+    def search(
+        self, query: np.ndarray, journal_ids: Iterable[str], k: int
+    ) -> List[dict]:
+        with self.lock:
+            query = _normalize(np.asarray(query, dtype=np.float32).reshape(-1))
+            allowed = np.flatnonzero(np.isin(self.journal_ids, list(journal_ids)))
+            k = min(k, len(allowed))
+            if k == 0:
+                return []
+            # A small candidate set is cheaper to scan than to filter in the graph.
+            if self.hnsw is None or len(allowed) < HNSW_MIN_SECTIONS:
+                rows, similarities = self._exact(query, allowed, k)
+            else:
+                try:
+                    rows, similarities = self._approximate(query, allowed, k)
+                except RuntimeError:
+                    # The filtered graph walk found fewer than k neighbours.
+                    rows, similarities = self._exact(query, allowed, k)
+            return [
+                {
+                    "id": self.ids[row],
+                    "journal_id": self.journal_ids[row],
+                    "text": self.texts[row],
+                    "similarity": float(similarity),
+                }
+                for row, similarity in zip(rows, similarities)
+            ]
+
+
+@lru_cache(maxsize=None)
+def _hnswlib():
+    try:
+        import hnswlib
+    except ImportError:
+        logger.warning(
+            "⚠️ hnswlib is not installed, large local indexes use exact search. "
+            "`pip install hnswlib` to enable HNSW."
+        )
+        return None
+    return hnswlib
+
+
+def _build_hnsw(vectors: np.ndarray):
+    hnswlib = _hnswlib()
+    if hnswlib is None:
+        return None
+    index = hnswlib.Index(space="ip", dim=vectors.shape[1])
+    index.init_index(max_elements=2 * len(vectors), ef_construction=200, M=HNSW_M)
+    index.add_items(vectors, np.arange(len(vectors)))
+    return index
+
+
+class LocalVectorStore(VectorStore):
+    """Per user UserIndex of journal_sections, kept in a UserIndexCache."""
+
+    def __init__(self, max_users: int = LOCAL_INDEX_MAX_USERS):
+        self.indexes = UserIndexCache(
+            "local vector index", self._build, self._append, max_users
+        )
+
+    @staticmethod
+    def _build(user_id: str) -> UserIndex:
+        ids, journal_ids, texts, vectors = [], [], [], []
+        for row in fetch_user_sections(user_id, "id, journal_id, text, embedding"):
+            ids.append(row["id"])
+            journal_ids.append(row["journal_id"])
+            texts.append(row["text"])
+            vectors.append(parse_vector(row["embedding"]))
+
+        index = UserIndex(len(vectors[0]) if vectors else 0)
+        if vectors:
+            index.add(ids, journal_ids, texts, np.stack(vectors))
+        return index
+
+    @staticmethod
+    def _append(index: UserIndex, sections: List[JournalSection]) -> bool:
+        if not sections:
+            return True
+        vectors = np.asarray([s.embedding for s in sections], dtype=np.float32)
+        if len(index) and vectors.shape[1] != index.dimension:
+            return False
+        if not len(index):
+            index.dimension = vectors.shape[1]
+            index.vectors = np.empty((0, index.dimension), dtype=np.float32)
+        index.add(
+            [str(section.id) for section in sections],
+            [str(section.journal_id) for section in sections],
+            [section.text for section in sections],
+            vectors,
+        )
+        return True
+
+    def search(self, user_id, query_embedding, journal_ids, match_count):
+        if not journal_ids:
+            return []
+        index = self.indexes.get(user_id)
+        return index.search(query_embedding, journal_ids, match_count)
+
+
+@lru_cache(maxsize=None)
+def get_vector_store(name: str = VECTOR_STORE) -> VectorStore:
+    if name == "supabase":
+        return SupabaseVectorStore()
+    if name == "local":
+        return LocalVectorStore()
+    raise APIException(
+        status_code=500,
+        detail=f"VECTOR_STORE must be one of {', '.join(VECTOR_STORES)}, got {name}",
+        message="Invalid Vector Store",
+    )
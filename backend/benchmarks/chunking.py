@@ -0,0 +1,96 @@
+"""
+Chunk count, ingestion time and retrieval hit rate for chunking settings on the
+fixed corpus. Retrieval ranks entries by their best matching chunk, as
+match_journal_sections does, and checks the expected entry is in the top k.
+Run from backend/ with a valid .env:
+
+    python -m benchmarks.chunking --sizes 64 128 256 --overlaps 0 16 32
+"""
+
+import argparse
+import time
+import numpy as np
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.inference.models import load_embedding_model, load_mood_classifier
+from app.utils.chunking import SPECIAL_TOKENS, TokenChunker, load_tokenizer
+from benchmarks.corpus import ENTRIES, QUERIES
+
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def evaluate(name: str, split, embeddings, classifier, query_vectors, top_k: int):
+    start = time.perf_counter()
+    chunks, owners = [], []
+    for index, entry in enumerate(ENTRIES):
+        entry_chunks = split(entry["content"])
+        chunks.extend(entry_chunks)
+        owners.extend([index] * len(entry_chunks))
+    vectors = normalize(embeddings.embed_documents(chunks))
+    classifier(chunks, batch_size=32)
+    ingest_seconds = time.perf_counter() - start
+
+    owners = np.asarray(owners)
+    similarity = query_vectors @ vectors.T
+    hits_at_1 = hits_at_k = 0
+    for (_, expected), scores in zip(QUERIES, similarity):
+        best_per_entry = np.full(len(ENTRIES), -np.inf)
+        np.maximum.at(best_per_entry, owners, scores)
+        ranking = np.argsort(-best_per_entry)
+        hits_at_1 += ranking[0] == expected
+        hits_at_k += expected in ranking[:top_k]
+
+    print(
+        f"{name:<24} chunks={len(chunks):4d} "
+        f"({len(chunks) / len(ENTRIES):5.1f}/entry)  "
+        f"ingest={ingest_seconds * 1000:8.1f} ms  "
+        f"hit@1={hits_at_1 / len(QUERIES):6.1%}  "
+        f"hit@{top_k}={hits_at_k / len(QUERIES):6.1%}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--overlaps", type=int, nargs="+", default=[0, 16, 32])
+    parser.add_argument("--top-k", type=int, default=3)
+    args = parser.parse_args()
+
+    embeddings = load_embedding_model()
+    classifier = load_mood_classifier()
+    query_vectors = normalize(
+        embeddings.embed_documents([query for query, _ in QUERIES])
+    )
+    tokenizer, model_max_tokens = load_tokenizer()
+
+    legacy = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=20)
+    evaluate(
+        "legacy 100 chars/20",
+        legacy.split_text,
+        embeddings,
+        classifier,
+        query_vectors,
+        args.top_k,
+    )
+    for size in args.sizes:
+        if model_max_tokens and size > model_max_tokens:
+            print(f"tokens {size}: over the model's {model_max_tokens} tokens, skipped")
+            continue
+        for overlap in args.overlaps:
+            if overlap >= size - SPECIAL_TOKENS:
+                continue
+            chunker = TokenChunker(tokenizer, size, overlap)
+            evaluate(
+                f"tokens {size}/{overlap}",
+                chunker.split_text,
+                embeddings,
+                classifier,
+                query_vectors,
+                args.top_k,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Fixed journal entries shared by the benchmarks, so runs are comparable."""
+
+ENTRIES = [
+    {
+        "title": "Exam week nerves",
+        "content": "Three exams in four days. I barely slept before the data structures paper and my hands were shaking when the invigilator handed out the sheets. The graph questions went better than I expected though. Afterwards Meera and I got chai outside the library and laughed about how dramatic we had been all week. I am relieved it is over, but I keep replaying the one question about heaps I got wrong.",
+    },
+    {
+        "title": "Morning run by the lake",
+        "content": "Woke up at six and ran the full loop around the lake for the first time without stopping. The air was cold and the water was completely still. My knees hurt a little on the last stretch but I felt proud when I saw the time on my watch. I want to make this a habit, three mornings a week at least, before classes start eating all my energy.",
+    },
+    {
+        "title": "Call with mom and dad",
+        "content": "Called home after dinner. Dad talked about the mango tree finally giving fruit and mom asked, again, whether I am eating properly. I did not tell them about the internship rejection yet. Hearing their voices made the hostel room feel less empty. I miss the noise of our house, the pressure cooker whistles and the neighbours arguing about cricket.",
+    },
+    {
+        "title": "Internship rejection",
+        "content": "Got the email from the startup this afternoon. They went with another candidate. I had prepared for weeks, practised system design with Arjun and rewrote my resume twice. It stings more than I expected. I sat on the terrace for an hour feeling disappointed and a bit embarrassed that I had told so many people about the interview.",
+    },
+    {
+        "title": "Cricket match with the hostel team",
+        "content": "Our hostel beat the civil engineering block by four wickets in the inter hostel tournament. I only scored twelve runs but took a diving catch at mid wicket that everyone keeps talking about. We celebrated with terrible canteen samosas and sang until the warden told us to go to sleep. Pure joy, the best evening this semester.",
+    },
+    {
+        "title": "Networks lab finally works",
+        "content": "Spent the whole lab session debugging the routing table for the distance vector assignment. The packets kept looping between two nodes because I forgot split horizon. When it finally converged the TA came over and said it was one of the cleaner implementations. Small win, but I will take it. Computer networks is slowly becoming my favourite subject.",
+    },
+    {
+        "title": "Grandmother in hospital",
+        "content": "Mom called to say grandmother was admitted with breathing trouble. The doctors say she is stable but I could not focus on anything for the rest of the day. I kept thinking about the summers at her house, the pickles drying on the roof and the stories she told about the village. I booked a bus ticket home for Friday. I am scared and I feel helpless being so far away.",
+    },
+    {
+        "title": "Gratitude list",
+        "content": "Trying the gratitude exercise the counsellor suggested. Grateful for Meera who always checks on me, for the library staying open late during exams, for the street dog near the gate who waits for biscuits every evening, and for my body that carried me around the lake this morning. Writing it down actually made me feel lighter and more optimistic.",
+    },
+    {
+        "title": "Fight with roommate",
+        "content": "Argued with Rohan about the lights again. He studies until three in the morning and I cannot sleep with the lamp on. We both said things we did not mean. I was annoyed and then felt guilty for snapping at him because he is stressed about his backlog. Tomorrow I will apologise and suggest he uses the common room after midnight.",
+    },
+    {
+        "title": "Hackathon weekend",
+        "content": "Thirty six hours at the college hackathon building a journaling app that detects moods from entries. Priya handled the frontend, I wired the embeddings and the search. The demo crashed once in front of the judges but we recovered and ended up in third place. Exhausted, excited, and already thinking about what we would build differently next time.",
+    },
+    {
+        "title": "Rainy day reading",
+        "content": "Classes got cancelled because of the rain so I stayed in and finished the novel Ananya lent me. The ending surprised me completely, I had suspected the wrong brother the whole time. There is something calm about a grey day with nowhere to be. Made instant noodles, listened to old songs and did absolutely nothing productive, without any guilt.",
+    },
+    {
+        "title": "Placement season anxiety",
+        "content": "Placement season starts next month and everyone in the batch is talking about packages and mock interviews. I feel nervous and confused about whether to aim for product companies or research internships. My mentor said to focus on fundamentals rather than chasing every opening. I made a study plan for dynamic programming and operating systems, which helped calm me down a little.",
+    },
+]
+
+# Retrieval queries and the index of the entry each one should find.
+QUERIES = [
+    ("How did I feel during my exams?", 0),
+    ("When did I go running?", 1),
+    ("What did my parents talk about on the phone?", 2),
+    ("Was I upset about not getting the internship?", 3),
+    ("Tell me about the cricket game", 4),
+    ("Did the routing assignment work out?", 5),
+    ("How is my grandmother doing?", 6),
+    ("What am I thankful for?", 7),
+    ("Why did I argue with Rohan?", 8),
+    ("How did the hackathon go?", 9),
+    ("What book did I finish?", 10),
+    ("Am I worried about placements?", 11),
+    ("Which day did I take a diving catch?", 4),
+    ("When was I scared for my family?", 6),
+    ("What did I build with Priya?", 9),
+    ("What did the counsellor suggest?", 7),
+]
+
+# Held-out chat queries with their intent, none of them is an example prompt
+# of app.utils.intent.
+INTENT_QUERIES = [(query, "journal") for query, _ in QUERIES] + [
+    ("What was going on with me around Diwali?", "journal"),
+    ("Did I write anything when I was sick?", "journal"),
+    ("Which entries talk about my roommate?", "journal"),
+    ("How many times did I feel lonely in September?", "journal"),
+    ("Was last weekend a good one for me?", "journal"),
+    ("What did you tell me a minute ago?", "history"),
+    ("Say that again but shorter", "history"),
+    ("What was the last thing I asked?", "history"),
+    ("Can you expand on your previous point?", "history"),
+    ("Continue from where you left off", "history"),
+    ("Which of those did you mention first?", "history"),
+    ("What is 17 times 23?", "unrelated"),
+    ("Write a bash script that renames files", "unrelated"),
+    ("Who wrote Pride and Prejudice?", "unrelated"),
+    ("Tell me something funny", "unrelated"),
+    ("How does photosynthesis work?", "unrelated"),
+    ("Convert 5 miles to kilometers", "unrelated"),
+    ("What's the best phone to buy right now?", "unrelated"),
+    ("Explain the difference between TCP and UDP", "unrelated"),
+    ("Integrate sin(x) from 0 to pi", "unrelated"),
+]
+
+
+def sentences():
+    """Every sentence of every entry, for benchmarks that need many short texts."""
+    return [
+        sentence.strip() + "."
+        for entry in ENTRIES
+        for sentence in entry["content"].split(".")
+        if sentence.strip()
+    ]
@@ -0,0 +1,136 @@
+"""
+Speed, resident memory and parity of the inference backends against the fp32
+PyTorch reference. Each backend runs in its own interpreter so its memory is
+measured in isolation. Exits 1 when a backend drifts past the parity bounds.
+Run from backend/ with a valid .env:
+
+    python -m benchmarks.inference_backends --backends torch torch-int8 onnx
+"""
+
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+from benchmarks.corpus import sentences
+
+
+def run_backend(backend: str, runs: int, out: str):
+    """Child process: load one backend, time it and save its outputs."""
+    from app.inference.models import load_embedding_model, load_mood_classifier
+
+    start = time.perf_counter()
+    embeddings = load_embedding_model(backend)
+    classifier = load_mood_classifier(backend)
+    load_seconds = time.perf_counter() - start
+
+    texts = sentences()
+    embeddings.embed_documents(texts[:4])
+    classifier(texts[:4], batch_size=4)
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        vectors = embeddings.embed_documents(texts)
+        results = classifier(texts, batch_size=32)
+    seconds = (time.perf_counter() - start) / runs
+
+    labels = sorted(score["label"] for score in results[0])
+    scores = [
+        [{s["label"]: s["score"] for s in result}[label] for label in labels]
+        for result in results
+    ]
+    np.savez(out, vectors=np.asarray(vectors, dtype=np.float32), scores=scores)
+    print(
+        json.dumps(
+            {
+                "load_seconds": load_seconds,
+                "seconds": seconds,
+                "texts": len(texts),
+                # ru_maxrss is reported in kilobytes on Linux.
+                "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+            }
+        )
+    )
+
+
+def parity(reference, candidate) -> dict:
+    ref_vectors, vectors = reference["vectors"], candidate["vectors"]
+    cosine = np.sum(ref_vectors * vectors, axis=1) / (
+        np.linalg.norm(ref_vectors, axis=1) * np.linalg.norm(vectors, axis=1)
+    )
+    ref_scores, scores = reference["scores"], candidate["scores"]
+    return {
+        "min_cosine": float(cosine.min()),
+        "label_agreement": float(
+            np.mean(ref_scores.argmax(axis=1) == scores.argmax(axis=1))
+        ),
+        "max_score_drift": float(np.abs(ref_scores - scores).max()),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--backends", nargs="+", default=["torch", "torch-int8", "onnx"]
+    )
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--min-cosine", type=float, default=0.98)
+    parser.add_argument("--min-label-agreement", type=float, default=0.9)
+    parser.add_argument("--max-score-drift", type=float, default=0.1)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--out", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_backend(args.child, args.runs, args.out)
+        return
+
+    backends = ["torch"] + [b for b in args.backends if b != "torch"]
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        stats, outputs = {}, {}
+        for backend in backends:
+            out = os.path.join(tmp, f"{backend}.npz")
+            process = subprocess.run(
+                [sys.executable, "-m", "benchmarks.inference_backends"]
+                + ["--child", backend, "--out", out, "--runs", str(args.runs)],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            stats[backend] = json.loads(process.stdout.strip().splitlines()[-1])
+            outputs[backend] = np.load(out)
+
+        reference = stats["torch"]
+        print(f"{stats['torch']['texts']} texts, {args.runs} runs per backend")
+        for backend in backends:
+            result = stats[backend]
+            drift = parity(outputs["torch"], outputs[backend])
+            print(
+                f"{backend:<11} {result['seconds'] * 1000:8.1f} ms/run  "
+                f"speedup x{reference['seconds'] / result['seconds']:4.2f}  "
+                f"load {result['load_seconds']:5.1f}s  "
+                f"RSS {result['rss_mb']:6.0f} MB  "
+                f"min cosine {drift['min_cosine']:.4f}  "
+                f"label agreement {drift['label_agreement']:.2%}  "
+                f"max score drift {drift['max_score_drift']:.4f}"
+            )
+            if drift["min_cosine"] < args.min_cosine:
+                failures.append(f"{backend}: embedding cosine below bound")
+            if drift["label_agreement"] < args.min_label_agreement:
+                failures.append(f"{backend}: dominant mood agreement below bound")
+            if drift["max_score_drift"] > args.max_score_drift:
+                failures.append(f"{backend}: mood score drift above bound")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Offline accuracy and latency of the chat intent classifier on the held-out
+INTENT_QUERIES. For a range of margins it reports how many queries are decided
+locally (coverage) and how many of those are right, alone and with the keyword
+rules of app.utils.query_parsing as fallback. Queries neither decides go to
+Gemini. Run from backend/ with a valid .env:
+
+    python -m benchmarks.intent
+    python -m benchmarks.intent --margins 0 0.05 0.1
+"""
+
+import argparse
+import time
+import numpy as np
+
+from app.utils.intent import INTENT_MARGIN, INTENTS, intent_centroids, intent_scores
+from app.utils.query_parsing import normalize_query, rule_intent
+from app.utils.utils import embedding_cache
+from benchmarks.corpus import INTENT_QUERIES
+
+
+def score_queries():
+    """Intent scores per query and the classifier latency per query in ms."""
+    scores, latencies = [], []
+    for query, _ in INTENT_QUERIES:
+        # Uncached, as for a query seen for the first time.
+        embedding_cache.clear()
+        start = time.perf_counter()
+        scores.append(intent_scores(query))
+        latencies.append((time.perf_counter() - start) * 1000)
+    return np.stack(scores), latencies
+
+
+def decide(scores: np.ndarray, margin: float):
+    ranked = np.sort(scores)
+    if ranked[-1] - ranked[-2] < margin:
+        return None
+    return INTENTS[int(np.argmax(scores))]
+
+
+def report(scores: np.ndarray, margin: float):
+    expected = [intent for _, intent in INTENT_QUERIES]
+    classified = [decide(row, margin) for row in scores]
+    combined = [
+        intent or rule_intent(normalize_query(query))
+        for intent, (query, _) in zip(classified, INTENT_QUERIES)
+    ]
+
+    def rates(decided):
+        covered = [(d, e) for d, e in zip(decided, expected) if d is not None]
+        correct = sum(d == e for d, e in covered)
+        accuracy = correct / len(covered) if covered else 1.0
+        return len(covered) / len(expected), accuracy
+
+    coverage, accuracy = rates(classified)
+    with_rules, rules_accuracy = rates(combined)
+    print(
+        f"{margin:6.2f}  {coverage:8.1%}  {accuracy:8.1%}  "
+        f"{with_rules:10.1%}  {rules_accuracy:10.1%}"
+    )
+
+
+def confusion(classified):
+    labels = list(INTENTS) + [None]
+    print(f"\nat margin {INTENT_MARGIN}, rows expected, columns predicted")
+    print(f"{'':>10}" + "".join(f"{str(label):>11}" for label in labels))
+    for expected in INTENTS:
+        row = [
+            sum(
+                1
+                for c, (_, e) in zip(classified, INTENT_QUERIES)
+                if e == expected and c == label
+            )
+            for label in labels
+        ]
+        print(f"{expected:>10}" + "".join(f"{count:>11}" for count in row))
+    for c, (query, expected) in zip(classified, INTENT_QUERIES):
+        if c is not None and c != expected:
+            print(f"  wrong: {query!r} expected {expected}, got {c}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--margins",
+        type=float,
+        nargs="+",
+        default=[0.0, 0.02, 0.04, 0.06, INTENT_MARGIN, 0.12, 0.16],
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    intent_centroids()
+    print(f"centroids built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    scores, latencies = score_queries()
+    print(
+        f"{len(INTENT_QUERIES)} queries, latency median "
+        f"{np.median(latencies):.2f} ms, p95 {np.percentile(latencies, 95):.2f} ms\n"
+    )
+
+    print(" margin  coverage  accuracy  +rules cov  +rules acc")
+    for margin in sorted(set(args.margins)):
+        report(scores, margin)
+    confusion([decide(row, INTENT_MARGIN) for row in scores])
+
+
+if __name__ == "__main__":
+    main()
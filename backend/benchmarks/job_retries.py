@@ -0,0 +1,103 @@
+"""
+Retry check for draft submission jobs. A draft whose insert fails once with a
+transient error must be retried and stored, and a missing draft must fail on
+the first attempt without retries. Inference and the insert are replaced, so
+only Redis is used. Run from backend/ with a valid .env, exits 1 on failure:
+
+    python -m benchmarks.job_retries
+"""
+
+import json
+import sys
+import time
+from datetime import date
+from uuid import uuid4
+
+from app.core.connection import redis_client
+from app.utils import ingestion
+from app.utils.jobs import enqueue_job, get_job
+
+
+class FlakyInsert:
+    """Fails like a dropped Supabase connection on the first ``failures`` calls."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self, journal, sections, db):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise ValueError("Insertion failed: connection reset by peer")
+        return journal["id"]
+
+
+def wait_for(job_id: str, timeout: float = 30.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = get_job(job_id)
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.2)
+    raise TimeoutError(f"job {job_id} still {job['status']} after {timeout}s")
+
+
+def run_job(user_id: str) -> dict:
+    today = date.today().isoformat()
+    job = enqueue_job(
+        ingestion.journal_id_for(user_id, today),
+        user_id,
+        ingestion.submit_draft,
+        user_id,
+        today,
+    )
+    return wait_for(job["job_id"])
+
+
+def main() -> int:
+    user_id = str(uuid4())
+    today = date.today().isoformat()
+    draft = {
+        "content": "A short entry for the retry check.",
+        "user_id": user_id,
+        "date": today,
+        "tags": [],
+        "title": "Retry check",
+        "rich_text": "",
+    }
+    insert = FlakyInsert(failures=1)
+    original = (
+        ingestion.prepare_journal,
+        ingestion.insert_journal_with_sections,
+        ingestion.sections_added,
+    )
+    ingestion.prepare_journal = lambda draft, journal_id, now: ({"id": journal_id}, [])
+    ingestion.insert_journal_with_sections = insert
+    ingestion.sections_added = lambda user_id, sections: None
+    failures = []
+    try:
+        redis_client.set(f"Draft:{user_id}:{today}", json.dumps(draft), ex=300)
+        job = run_job(user_id)
+        print(f"transient insert failure: {job['status']}, {job['attempts']} attempts")
+        if job["status"] != "done" or job["attempts"] != 2:
+            failures.append("a transient insert failure was not retried")
+
+        job = run_job(str(uuid4()))
+        print(f"missing draft: {job['status']}, {job['attempts']} attempts")
+        if job["status"] != "failed" or job["attempts"] != 1:
+            failures.append("a missing draft was retried")
+    finally:
+        (
+            ingestion.prepare_journal,
+            ingestion.insert_journal_with_sections,
+            ingestion.sections_added,
+        ) = original
+        redis_client.delete(f"Draft:{user_id}:{today}")
+
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Throughput against p50/p99 latency for the micro-batching scheduler. Concurrent
+clients each send single-text requests, as chat queries and titles do, through
+batchers with different settings. ``max_batch_size=1`` is the unbatched
+baseline. Run from backend/ with a valid .env:
+
+    python -m benchmarks.micro_batching --clients 16 --requests 20
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import time
+import numpy as np
+
+from app.inference.batching import MicroBatcher
+from app.inference.models import embedding_model, mood_classifier
+
+QUERIES = [
+    "How was I feeling during exam week?",
+    "What did I write about my parents last month?",
+    "Show me the days I felt proud of my work.",
+    "When did I last go for a run?",
+    "Was I anxious before the placement interview?",
+    "Which entries mention the cricket match?",
+    "Summarise my mood over the holidays.",
+    "What made me grateful in April?",
+]
+
+SETTINGS = [(1, 0), (8, 2), (16, 5), (32, 5), (32, 10), (64, 20)]
+
+
+def run_batch_for(model: str):
+    if model == "embedding":
+        return lambda texts: embedding_model().model.embed_documents(texts)
+    return lambda texts: mood_classifier().classifier(texts, batch_size=len(texts))
+
+
+def measure(model: str, max_batch_size: int, max_wait_ms: float, args):
+    batch_sizes = []
+    run = run_batch_for(model)
+
+    def counted(texts):
+        batch_sizes.append(len(texts))
+        return run(texts)
+
+    batcher = MicroBatcher(counted, max_batch_size, max_wait_ms, name="benchmark")
+
+    def client(index: int):
+        latencies = []
+        for i in range(args.requests):
+            query = QUERIES[(index + i) % len(QUERIES)]
+            start = time.perf_counter()
+            batcher([query])
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as pool:
+        latencies = np.concatenate(list(pool.map(client, range(args.clients))))
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"{model:<10} max_batch={max_batch_size:<3} max_wait={max_wait_ms:>4.0f}ms  "
+        f"throughput={len(latencies) / elapsed:8.1f} req/s  "
+        f"p50={np.percentile(latencies, 50) * 1000:7.1f} ms  "
+        f"p99={np.percentile(latencies, 99) * 1000:7.1f} ms  "
+        f"mean batch={np.mean(batch_sizes):5.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument(
+        "--model", choices=["embedding", "classifier", "both"], default="both"
+    )
+    args = parser.parse_args()
+
+    models = ["embedding", "classifier"] if args.model == "both" else [args.model]
+    for model in models:
+        run_batch_for(model)(QUERIES)  # warm up
+        for max_batch_size, max_wait_ms in SETTINGS:
+            measure(model, max_batch_size, max_wait_ms, args)
+
+
+if __name__ == "__main__":
+    main()
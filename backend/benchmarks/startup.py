@@ -0,0 +1,96 @@
+"""
+Import-time report and startup budget check for ``import app.main``.
+
+    python -m benchmarks.startup                  # -X importtime report
+    python -m benchmarks.startup --check          # exit 1 when over budget
+
+The check imports the app in a fresh interpreter and fails when wall time or
+peak resident memory exceed the budget, or when a heavy model library is
+imported at startup instead of on first use. Run from backend/ with a valid .env,
+the pre-commit hook runs the check so a regression blocks the commit.
+"""
+
+import argparse
+import resource
+import subprocess
+import sys
+import time
+
+# Libraries that belong to model inference and must only load on first use.
+LAZY_MODULES = (
+    "torch",
+    "transformers",
+    "sentence_transformers",
+    "langchain_huggingface",
+    "dateparser",
+    "sympy",
+    "sklearn",
+)
+
+
+def import_app(*flags: str) -> subprocess.CompletedProcess:
+    return subprocess.run(
+        [sys.executable, *flags, "-c", "import app.main"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def parse_importtime(stderr: str):
+    """(cumulative microseconds, module) for each line of -X importtime output."""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        modules.append((int(cumulative), name.strip()))
+    return modules
+
+
+def report(top: int):
+    modules = parse_importtime(import_app("-X", "importtime").stderr)
+    print(f"{'cumulative ms':>14}  module")
+    for cumulative, name in sorted(modules, reverse=True)[:top]:
+        print(f"{cumulative / 1000:14.1f}  {name}")
+
+
+def check(max_seconds: float, max_mb: float) -> int:
+    start = time.perf_counter()
+    process = import_app("-X", "importtime")
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is reported in kilobytes on Linux.
+    peak_mb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / 1024
+
+    imported = {name for _, name in parse_importtime(process.stderr)}
+    eager = sorted(module for module in LAZY_MODULES if module in imported)
+
+    print(f"import app.main: {elapsed:.2f}s (budget {max_seconds}s)")
+    print(f"peak RSS: {peak_mb:.0f} MB (budget {max_mb} MB)")
+    failures = []
+    if elapsed > max_seconds:
+        failures.append("import time over budget")
+    if peak_mb > max_mb:
+        failures.append("memory over budget")
+    if eager:
+        failures.append(f"imported at startup: {', '.join(eager)}")
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--max-seconds", type=float, default=5.0)
+    parser.add_argument("--max-mb", type=float, default=350.0)
+    args = parser.parse_args()
+
+    if args.check:
+        sys.exit(check(args.max_seconds, args.max_mb))
+    report(args.top)
+
+
+if __name__ == "__main__":
+    main()
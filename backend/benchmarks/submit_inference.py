@@ -0,0 +1,132 @@
+"""
+Classifier and embedding invocations and wall time per draft submission, legacy call pattern
+against the single pass ingestion engine. Run from backend/ with a valid .env:
+
+    python -m benchmarks.submit_inference --runs 5
+"""
+
+import argparse
+import time
+from datetime import date, datetime, timezone
+from uuid import uuid4
+
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+from app.db.schemas.journal import DraftCreate
+from app.utils import utils
+from app.utils.chunking import chunk_text
+from app.utils.ingestion import aggregate_moods, prepare_journal
+
+LEGACY_SPLITTER = RecursiveCharacterTextSplitter(chunk_size=100, chunk_overlap=20)
+
+SAMPLE_ENTRY = (
+    "Woke up early and went for a run before class. The lecture on computer "
+    "networks dragged on, but the lab afterwards was fun because we finally got "
+    "the routing table working. Lunch with Priya and Arjun turned into a long "
+    "talk about internships and whether any of us are ready for the placement "
+    "season. I felt nervous about it for most of the afternoon. In the evening I "
+    "called my parents, which helped a lot, and then spent two hours on the "
+    "project. I am grateful for friends who listen and a little proud that I "
+    "kept going even when I wanted to stop. Tomorrow I want to sleep on time, "
+    "finish the report and maybe watch the cricket match with everyone. "
+) * 4
+
+
+class CountingClassifier:
+    def __init__(self, classifier):
+        self.classifier = classifier
+        self.calls = 0
+        self.texts = 0
+
+    def __call__(self, inputs, **kwargs):
+        self.calls += 1
+        self.texts += 1 if isinstance(inputs, str) else len(inputs)
+        return self.classifier(inputs, **kwargs)
+
+
+class CountingEmbeddings:
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        return self.model.embed_documents(texts)
+
+
+def uncached(fn, *args):
+    """
+    Call fn with empty inference caches. submit_draft had no caches before the
+    ingestion engine, so the legacy pattern repeating a text paid for it twice.
+    """
+    utils.embedding_cache.clear()
+    utils.mood_cache.clear()
+    return fn(*args)
+
+
+def legacy_submission(draft: DraftCreate):
+    """The inference performed by submit_draft before the ingestion engine."""
+    chunks = LEGACY_SPLITTER.split_text(draft.content)
+    uncached(utils.embed_texts, chunks)
+    uncached(utils.analyze_mood, draft.content)
+    uncached(utils.direct_embedding, draft.title)
+    aggregate_moods([uncached(utils.analyze_mood, chunk) for chunk in chunks])
+    for chunk in chunks:
+        uncached(utils.analyze_mood, chunk)
+        uncached(utils.direct_embedding, chunk)
+
+
+def engine_submission(draft: DraftCreate):
+    prepare_journal(draft, str(uuid4()), datetime.now(timezone.utc))
+
+
+def measure(name: str, fn, draft: DraftCreate, runs: int):
+    counter = CountingClassifier(utils.mood_classifier())
+    embeddings = CountingEmbeddings(utils.embedding_model())
+    original = utils.mood_classifier, utils.embedding_model
+    utils.mood_classifier, utils.embedding_model = lambda: counter, lambda: embeddings
+    try:
+        start = time.perf_counter()
+        for _ in range(runs):
+            # Measure model work, not inference cache hits from the last run.
+            utils.embedding_cache.clear()
+            utils.mood_cache.clear()
+            fn(draft)
+        elapsed = (time.perf_counter() - start) / runs
+    finally:
+        utils.mood_classifier, utils.embedding_model = original
+    print(
+        f"{name:<8} classifier calls/submission: {counter.calls / runs:6.1f}  "
+        f"texts classified/submission: {counter.texts / runs:6.1f}  "
+        f"embedding calls/submission: {embeddings.calls / runs:6.1f}  "
+        f"wall time/submission: {elapsed * 1000:8.1f} ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    draft = DraftCreate(
+        content=SAMPLE_ENTRY,
+        user_id=uuid4(),
+        date=date.today().isoformat(),
+        tags=["study"],
+        title="A long day of classes and friends",
+        rich_text="",
+    )
+    print(
+        f"entry: {len(draft.content)} characters, "
+        f"{len(LEGACY_SPLITTER.split_text(draft.content))} legacy chunks, "
+        f"{len(chunk_text(draft.content))} token-aware chunks"
+    )
+
+    # Warm up both models so the first measured run is not paying for loading.
+    engine_submission(draft)
+    measure("before", legacy_submission, draft, args.runs)
+    measure("after", engine_submission, draft, args.runs)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+Recall and latency of the vector store backends. Exact NumPy search over the
+user's sections is the ground truth. The Supabase RPC and an HNSW graph over
+the same sections are compared against it. With --synthetic the local index
+is filled with clustered random vectors instead, to see how exact search and
+HNSW scale without a database. Run from backend/ with a valid .env:
+
+    python -m benchmarks.vector_store --user-id <uuid> --top-k 5
+    python -m benchmarks.vector_store --synthetic 20000 50000
+"""
+
+import argparse
+import time
+import numpy as np
+
+from app.utils.vector_store import (
+    LocalVectorStore,
+    SupabaseVectorStore,
+    UserIndex,
+    _build_hnsw,
+)
+from benchmarks.corpus import QUERIES
+
+
+def timed(search, queries, runs: int):
+    """Results of the last run and the median latency per query in ms."""
+    latencies = []
+    for _ in range(runs):
+        results = []
+        for query in queries:
+            start = time.perf_counter()
+            results.append(search(query))
+            latencies.append((time.perf_counter() - start) * 1000)
+    return results, float(np.median(latencies))
+
+
+def recall(truth, results) -> float:
+    hits = total = 0
+    for expected, found in zip(truth, results):
+        expected = {match["id"] for match in expected}
+        hits += len(expected & {match["id"] for match in found})
+        total += len(expected)
+    return hits / total if total else 1.0
+
+
+def report(name: str, truth, results, latency: float):
+    print(
+        f"{name:<10} recall@k={recall(truth, results):6.1%}  "
+        f"median={latency:8.3f} ms/query"
+    )
+
+
+def compare_local(index: UserIndex, queries, top_k: int, runs: int):
+    allowed = np.arange(len(index))
+
+    def search_with(method):
+        def search(query):
+            rows, _ = method(query / np.linalg.norm(query), allowed, top_k)
+            return [{"id": index.ids[row]} for row in rows]
+
+        return search
+
+    truth, latency = timed(search_with(index._exact), queries, runs)
+    report("exact", truth, truth, latency)
+
+    if index.hnsw is None:
+        start = time.perf_counter()
+        index.hnsw = _build_hnsw(index.vectors)
+        if index.hnsw is None:
+            return truth
+        print(f"hnsw graph built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    results, latency = timed(search_with(index._approximate), queries, runs)
+    report("hnsw", truth, results, latency)
+    return truth
+
+
+def live(user_id: str, top_k: int, runs: int):
+    from app.utils.utils import embed_texts
+
+    queries = embed_texts([query for query, _ in QUERIES])
+    start = time.perf_counter()
+    index = LocalVectorStore._build(user_id)
+    print(
+        f"user {user_id}: {len(index)} sections, "
+        f"index built in {(time.perf_counter() - start) * 1000:.1f} ms"
+    )
+    if not len(index):
+        return
+    truth = compare_local(index, queries, top_k, runs)
+
+    supabase = SupabaseVectorStore()
+    journal_ids = sorted(set(index.journal_ids))
+    results, latency = timed(
+        lambda q: supabase.search(user_id, q, journal_ids, top_k), queries, runs
+    )
+    report("supabase", truth, results, latency)
+
+
+def clustered(rng, size: int, dimension: int) -> np.ndarray:
+    """Noisy copies of size / 100 centres, closer to real embeddings than noise."""
+    centres = rng.standard_normal((max(1, size // 100), dimension), dtype=np.float32)
+    vectors = centres[rng.integers(0, len(centres), size)]
+    return vectors + 0.5 * rng.standard_normal((size, dimension), dtype=np.float32)
+
+
+def synthetic(sizes, dimension: int, top_k: int, runs: int):
+    rng = np.random.default_rng(0)
+    for size in sizes:
+        vectors = clustered(rng, size, dimension)
+        index = UserIndex(dimension)
+        index.add(
+            [str(i) for i in range(size)],
+            [str(i // 4) for i in range(size)],
+            [""] * size,
+            vectors,
+        )
+        queries = vectors[rng.integers(0, size, len(QUERIES))]
+        queries = queries + 0.1 * rng.standard_normal(queries.shape, dtype=np.float32)
+        print(f"synthetic: {size} sections of dimension {dimension}")
+        compare_local(index, queries, top_k, runs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--user-id")
+    parser.add_argument("--synthetic", type=int, nargs="+")
+    parser.add_argument("--dimension", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    if args.user_id:
+        live(args.user_id, args.top_k, args.runs)
+    if args.synthetic:
+        synthetic(args.synthetic, args.dimension, args.top_k, args.runs)
+    if not args.user_id and not args.synthetic:
+        parser.error("pass --user-id, --synthetic or both")
+
+
+if __name__ == "__main__":
+    main()
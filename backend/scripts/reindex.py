@@ -0,0 +1,200 @@
+"""
+Rebuild journals.embedding, journals.title_embedding and
+journal_sections.embedding with the current VECTOR_MODEL, e.g. after changing
+it. Journals are streamed page by page in id order, their texts are embedded in
+large batches across a process pool and each page is written back with one
+bulk RPC. Progress is checkpointed after every page, so rerunning the command
+after a crash resumes where it stopped. Run from backend/ with a valid .env:
+
+    python -m scripts.reindex --workers 4 --page-size 100
+
+If the new model has a different dimension, alter the vector columns first.
+"""
+
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import time
+from typing import List
+import numpy as np
+
+from app.core.config import MODEL_VECTOR
+from app.core.connection import db
+from app.utils.section_index import sections_changed
+
+SECTION_PAGE_SIZE = 1000
+
+_worker_model = None
+
+
+def _init_worker(threads: int):
+    global _worker_model
+    import torch
+
+    from app.inference.models import load_embedding_model
+
+    # Every process gets its share of the cores instead of all of them.
+    torch.set_num_threads(threads)
+    _worker_model = load_embedding_model()
+
+
+def _embed_batch(texts: List[str]) -> np.ndarray:
+    return np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+
+
+def load_checkpoint(path: str, restart: bool) -> dict:
+    if not restart and os.path.exists(path):
+        with open(path) as f:
+            checkpoint = json.load(f)
+        if checkpoint["model"] == MODEL_VECTOR:
+            return checkpoint
+        print(f"Checkpoint is for {checkpoint['model']}, starting over")
+    return {
+        "model": MODEL_VECTOR,
+        "last_journal_id": None,
+        "journals": 0,
+        "sections": 0,
+    }
+
+
+def save_checkpoint(path: str, checkpoint: dict):
+    # Write then rename, so a crash never leaves a half written checkpoint.
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(f"{path}.tmp", path)
+
+
+def fetch_page(last_journal_id, page_size: int):
+    query = db.table("journals").select("id, user_id, title, content").order("id")
+    if last_journal_id:
+        query = query.gt("id", last_journal_id)
+    journals = query.limit(page_size).execute().data
+    if not journals:
+        return [], []
+    # PostgREST caps rows per response, so the sections are paged as well.
+    sections, offset = [], 0
+    while True:
+        rows = (
+            db.table("journal_sections")
+            .select("id, journal_id, text")
+            .in_("journal_id", [journal["id"] for journal in journals])
+            .order("id")
+            .range(offset, offset + SECTION_PAGE_SIZE - 1)
+            .execute()
+            .data
+        )
+        sections.extend(rows)
+        if len(rows) < SECTION_PAGE_SIZE:
+            return journals, sections
+        offset += SECTION_PAGE_SIZE
+
+
+def embed(pool: ProcessPoolExecutor, texts: List[str], batch_size: int) -> np.ndarray:
+    batches = [texts[i : i + batch_size] for i in range(0, len(texts), batch_size)]
+    return np.concatenate(list(pool.map(_embed_batch, batches)))
+
+
+def reindex_page(pool, journals, sections, batch_size: int):
+    sections_by_journal = {}
+    for section in sections:
+        sections_by_journal.setdefault(section["journal_id"], []).append(section)
+    # Journals without sections are pooled from their full content, as on submit.
+    empty = [j for j in journals if j["id"] not in sections_by_journal]
+
+    texts = (
+        [section["text"] for section in sections]
+        + [journal["title"] for journal in journals]
+        + [journal["content"] for journal in empty]
+    )
+    vectors = embed(pool, texts, batch_size)
+    section_vectors = dict(zip((s["id"] for s in sections), vectors[: len(sections)]))
+    title_vectors = vectors[len(sections) : len(sections) + len(journals)]
+    content_vectors = dict(
+        zip((j["id"] for j in empty), vectors[len(sections) + len(journals) :])
+    )
+
+    journal_rows = []
+    for journal, title_vector in zip(journals, title_vectors):
+        own = sections_by_journal.get(journal["id"])
+        if own:
+            pooled = np.mean([section_vectors[s["id"]] for s in own], axis=0)
+        else:
+            pooled = content_vectors[journal["id"]]
+        journal_rows.append(
+            {
+                "id": journal["id"],
+                "embedding": pooled.tolist(),
+                "title_embedding": title_vector.tolist(),
+            }
+        )
+    section_rows = [
+        {"id": section_id, "embedding": vector.tolist()}
+        for section_id, vector in section_vectors.items()
+    ]
+    db.rpc(
+        "bulk_update_embeddings",
+        {"journal_rows": journal_rows, "section_rows": section_rows},
+    ).execute()
+    # Section indexes the API workers built before this page was written hold
+    # the old vectors, bumping the version makes them rebuild on next use.
+    for user_id in {journal["user_id"] for journal in journals}:
+        sections_changed(user_id)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--workers", type=int, default=max(1, os.cpu_count() // 2))
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--checkpoint", default="reindex_checkpoint.json")
+    parser.add_argument(
+        "--restart", action="store_true", help="ignore an existing checkpoint"
+    )
+    args = parser.parse_args()
+
+    checkpoint = load_checkpoint(args.checkpoint, args.restart)
+    if checkpoint["last_journal_id"]:
+        print(
+            f"Resuming after journal {checkpoint['last_journal_id']} "
+            f"({checkpoint['journals']} journals already done)"
+        )
+
+    threads = max(1, os.cpu_count() // args.workers)
+    start = time.perf_counter()
+    rows = 0
+    with ProcessPoolExecutor(
+        max_workers=args.workers, initializer=_init_worker, initargs=(threads,)
+    ) as pool:
+        while True:
+            page_start = time.perf_counter()
+            journals, sections = fetch_page(
+                checkpoint["last_journal_id"], args.page_size
+            )
+            if not journals:
+                break
+            reindex_page(pool, journals, sections, args.batch_size)
+
+            checkpoint["last_journal_id"] = journals[-1]["id"]
+            checkpoint["journals"] += len(journals)
+            checkpoint["sections"] += len(sections)
+            save_checkpoint(args.checkpoint, checkpoint)
+
+            page_rows = len(journals) + len(sections)
+            rows += page_rows
+            print(
+                f"{checkpoint['journals']} journals, {checkpoint['sections']} "
+                f"sections  page {page_rows / (time.perf_counter() - page_start):7.1f} "
+                f"rows/s  overall {rows / (time.perf_counter() - start):7.1f} rows/s"
+            )
+
+    print(
+        f"Done: {checkpoint['journals']} journals and {checkpoint['sections']} "
+        f"sections embedded with {MODEL_VECTOR}"
+    )
+
+
+if __name__ == "__main__":
+    main()
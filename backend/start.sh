@@ -0,0 +1,19 @@
+#!/bin/sh
+# Starts the shared inference service on a Unix socket, waits until it is
+# serving, then starts the API workers as thin clients of it.
+set -e
+
+SOCKET="${INFERENCE_URL#unix://}"
+
+uvicorn app.inference.server:app --uds "$SOCKET" &
+INFERENCE_PID=$!
+
+until [ -S "$SOCKET" ]; do
+	if ! kill -0 "$INFERENCE_PID" 2>/dev/null; then
+		echo "Inference service exited before it started serving" >&2
+		exit 1
+	fi
+	sleep 1
+done
+
+exec fastapi run ./app/main.py --port 8000 --workers "${API_WORKERS:-2}"
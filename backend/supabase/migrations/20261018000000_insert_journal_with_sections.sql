@@ -0,0 +1,31 @@
+-- Inserts a journal and all of its sections in one call. A plpgsql function body
+-- runs inside a single transaction, so a failure on any row rolls back the
+-- journal and every section with it. Ids are deterministic on the client side,
+-- which lets "on conflict do nothing" turn a retried submit into a no-op.
+create or replace function insert_journal_with_sections(journal jsonb, sections jsonb)
+returns uuid
+language plpgsql
+as $$
+declare
+  new_journal_id uuid := (journal ->> 'id')::uuid;
+begin
+  insert into journals (
+    id, user_id, content, moods, tags, embedding, title, title_embedding,
+    created_at, rich_text
+  )
+  select
+    id, user_id, content, moods, tags, embedding, title, title_embedding,
+    created_at, rich_text
+  from jsonb_populate_record(null::journals, journal)
+  on conflict (id) do nothing;
+
+  insert into journal_sections (
+    id, journal_id, section_number, text, moods, embedding, created_at
+  )
+  select id, journal_id, section_number, text, moods, embedding, created_at
+  from jsonb_populate_recordset(null::journal_sections, sections)
+  on conflict (id) do nothing;
+
+  return new_journal_id;
+end;
+$$;
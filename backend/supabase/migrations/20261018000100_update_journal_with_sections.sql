@@ -0,0 +1,48 @@
+-- Applies a journal edit in one transaction: updates the journal row, upserts
+-- the sections whose text changed and deletes every section of the journal
+-- that is not in keep_section_ids (the journal is now shorter, or the rows
+-- predate deterministic section ids). Only the owner's journal is updated.
+create or replace function update_journal_with_sections(
+  journal jsonb,
+  sections jsonb,
+  keep_section_ids uuid[]
+)
+returns uuid
+language plpgsql
+as $$
+declare
+  edited journals := jsonb_populate_record(null::journals, journal);
+begin
+  update journals
+  set
+    content = edited.content,
+    moods = edited.moods,
+    tags = edited.tags,
+    embedding = edited.embedding,
+    title = edited.title,
+    title_embedding = edited.title_embedding,
+    rich_text = edited.rich_text
+  where id = edited.id and user_id = edited.user_id;
+
+  if not found then
+    raise exception 'Journal % not found', edited.id;
+  end if;
+
+  insert into journal_sections (
+    id, journal_id, section_number, text, moods, embedding, created_at
+  )
+  select id, journal_id, section_number, text, moods, embedding, created_at
+  from jsonb_populate_recordset(null::journal_sections, sections)
+  on conflict (id) do update
+  set
+    section_number = excluded.section_number,
+    text = excluded.text,
+    moods = excluded.moods,
+    embedding = excluded.embedding;
+
+  delete from journal_sections
+  where journal_id = edited.id and not (id = any(keep_section_ids));
+
+  return edited.id;
+end;
+$$;
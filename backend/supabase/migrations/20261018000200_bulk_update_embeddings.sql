@@ -0,0 +1,23 @@
+-- Writes re-computed embeddings for a page of journals and their sections in
+-- one call, used by the reindex script when the embedding model changes.
+create or replace function bulk_update_embeddings(journal_rows jsonb, section_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  updated integer;
+begin
+  update journals j
+  set embedding = r.embedding, title_embedding = r.title_embedding
+  from jsonb_populate_recordset(null::journals, journal_rows) r
+  where j.id = r.id;
+  get diagnostics updated = row_count;
+
+  update journal_sections s
+  set embedding = r.embedding
+  from jsonb_populate_recordset(null::journal_sections, section_rows) r
+  where s.id = r.id;
+
+  return updated;
+end;
+$$;
@@ -0,0 +1,40 @@
+-- Bulk variant of insert_journal_with_sections for imports: a whole batch of
+-- journals and their sections is written in one transaction. Sections are only
+-- stored for journals inserted by this call, so an imported day that already
+-- has a journal is skipped entirely instead of gaining sections. Returns the
+-- number of journals inserted.
+create or replace function insert_journals_with_sections(journal_rows jsonb, section_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted_count integer;
+begin
+  with inserted as (
+    insert into journals (
+      id, user_id, content, moods, tags, embedding, title, title_embedding,
+      created_at, rich_text
+    )
+    select
+      id, user_id, content, moods, tags, embedding, title, title_embedding,
+      created_at, rich_text
+    from jsonb_populate_recordset(null::journals, journal_rows)
+    on conflict (id) do nothing
+    returning id
+  ), inserted_sections as (
+    insert into journal_sections (
+      id, journal_id, section_number, text, moods, embedding, created_at
+    )
+    select
+      r.id, r.journal_id, r.section_number, r.text, r.moods, r.embedding,
+      r.created_at
+    from jsonb_populate_recordset(null::journal_sections, section_rows) r
+    where r.journal_id in (select id from inserted)
+    on conflict (id) do nothing
+    returning id
+  )
+  select count(*) into inserted_count from inserted;
+
+  return inserted_count;
+end;
+$$;
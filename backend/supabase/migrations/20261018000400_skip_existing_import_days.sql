@@ -0,0 +1,46 @@
+-- Imports skip days that already have a journal. Journals submitted before
+-- imported ids were derived from the user and the date have random ids, so
+-- the conflict on id alone let an import add a second journal for their day.
+-- Rows are now also skipped when the user has a journal with the same
+-- created_at date.
+create or replace function insert_journals_with_sections(journal_rows jsonb, section_rows jsonb)
+returns integer
+language plpgsql
+as $$
+declare
+  inserted_count integer;
+begin
+  with inserted as (
+    insert into journals (
+      id, user_id, content, moods, tags, embedding, title, title_embedding,
+      created_at, rich_text
+    )
+    select
+      r.id, r.user_id, r.content, r.moods, r.tags, r.embedding, r.title,
+      r.title_embedding, r.created_at, r.rich_text
+    from jsonb_populate_recordset(null::journals, journal_rows) r
+    where not exists (
+      select 1
+      from journals j
+      where j.user_id = r.user_id
+        and j.created_at::date = r.created_at::date
+    )
+    on conflict (id) do nothing
+    returning id
+  ), inserted_sections as (
+    insert into journal_sections (
+      id, journal_id, section_number, text, moods, embedding, created_at
+    )
+    select
+      r.id, r.journal_id, r.section_number, r.text, r.moods, r.embedding,
+      r.created_at
+    from jsonb_populate_recordset(null::journal_sections, section_rows) r
+    where r.journal_id in (select id from inserted)
+    on conflict (id) do nothing
+    returning id
+  )
+  select count(*) into inserted_count from inserted;
+
+  return inserted_count;
+end;
+$$;
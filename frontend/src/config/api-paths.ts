@@ -14,7 +14,10 @@ const API_PATHS = {
   JOURNALS: {
     ADD_DRAFT: `/api/v1/journals/draft/add`,
     SUBMIT: `/api/v1/journals/draft/submit`,
+    SUBMIT_STATUS: (jobId: string) =>
+      `/api/v1/journals/draft/submit/${jobId}`,
     GET_ALL: `/api/v1/journals/`,
+    LIST: `/api/v1/journals/get`,
     LAST_SUBMITTED: `/api/v1/journals/last-submission-date`,
   },
 };
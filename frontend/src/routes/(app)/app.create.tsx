@@ -42,6 +42,26 @@ const tomorrowMidnight = new Date(
 );
 const tomorrowDate = format(tomorrowMidnight, "dd-MM-yyyy hh:mm a");
 
+type SubmitJob = {
+  job_id: string;
+  status: "queued" | "running" | "done" | "failed";
+  error?: string | null;
+};
+
+const SUBMIT_POLL_MS = 1500;
+
+async function waitForSubmission(job: SubmitJob) {
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, SUBMIT_POLL_MS));
+    job = (await api.get(
+      API_PATHS.JOURNALS.SUBMIT_STATUS(job.job_id),
+    )) as unknown as SubmitJob;
+  }
+  if (job.status === "failed") {
+    throw new Error(job.error || "Journal submission failed");
+  }
+}
+
 function RouteComponent() {
   const {
     richText,
@@ -73,7 +93,11 @@ function RouteComponent() {
     mutationKey: ["addJournal"],
     mutationFn: async (data: JournalInput) => {
       await api.post(API_PATHS.JOURNALS.ADD_DRAFT, data);
-      await api.post(API_PATHS.JOURNALS.SUBMIT, data);
+      const job = (await api.post(
+        API_PATHS.JOURNALS.SUBMIT,
+        data,
+      )) as unknown as SubmitJob;
+      await waitForSubmission(job);
     },
     onSuccess: () => {
       toast.success("Journal created successfully");
@@ -1,7 +1,9 @@
 import JournalEntries from "@/components/journals/journal-entries";
+import { Button } from "@/components/ui/button";
 import { Spinner } from "@/components/ui/spinner";
+import API_PATHS from "@/config/api-paths";
 import { api } from "@/lib/api-client";
-import { useQuery } from "@tanstack/react-query";
+import { useInfiniteQuery } from "@tanstack/react-query";
 import { createFileRoute } from "@tanstack/react-router";
 
 export interface JournalEntry {
@@ -15,18 +17,28 @@ export interface JournalEntry {
   created_at: string;
 }
 
+type JournalPage = {
+  data: JournalEntry[];
+  next_cursor: string | null;
+};
+
 export const Route = createFileRoute("/(app)/app/journals")({
   component: RouteComponent,
 });
 
 function RouteComponent() {
-  const { data: journals, isPending } = useQuery({
-    queryKey: ["journals"],
-    queryFn: async () => {
-      const response = await api.get<JournalEntry[]>("/api/v1/journals/get");
-      return response;
-    },
-  });
+  const { data, isPending, fetchNextPage, hasNextPage, isFetchingNextPage } =
+    useInfiniteQuery({
+      queryKey: ["journals"],
+      queryFn: async ({ pageParam }) => {
+        const response = await api.get(API_PATHS.JOURNALS.LIST, {
+          params: { cursor: pageParam ?? undefined },
+        });
+        return response as unknown as JournalPage;
+      },
+      initialPageParam: null as string | null,
+      getNextPageParam: (lastPage) => lastPage.next_cursor,
+    });
   if (isPending) {
     return (
       <div className="flex h-full w-full items-center justify-center">
@@ -35,9 +47,22 @@ function RouteComponent() {
     );
   }
 
+  const journals = data?.pages.flatMap((page) => page.data) ?? [];
+
   return (
-    <div className="flex h-full w-full overflow-y-auto">
-      <JournalEntries data={journals! as any} />
+    <div className="flex h-full w-full flex-col overflow-y-auto">
+      <JournalEntries data={journals as any} />
+      {hasNextPage && (
+        <div className="flex justify-center p-5">
+          <Button
+            variant="outline"
+            onClick={() => fetchNextPage()}
+            disabled={isFetchingNextPage}
+          >
+            {isFetchingNextPage ? <Spinner /> : "Load older entries"}
+          </Button>
+        </div>
+      )}
     </div>
   );
 }